@@ -1,17 +1,51 @@
 from __future__ import annotations
 
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
 from datetime import date
-from datetime import datetime
+from itertools import accumulate, groupby, repeat
+from math import isnan
+from operator import add, truediv
 from pathlib import Path
+from typing import Container, Iterable, Iterator
 
 from src.momentum_weekly.config_utils import ensure_dir, load_config
-from src.momentum_weekly.io_utils import read_table, write_table
-
-
-def _to_date(value: object) -> date:
-    if isinstance(value, date):
-        return value
-    return datetime.strptime(str(value), "%Y-%m-%d").date()
+from src.momentum_weekly.dictionaries import (
+    SymbolTable,
+    TradingCalendar,
+    concat_keys,
+    load_keys,
+)
+from src.momentum_weekly.instrumentation import phase, stage_stats, timed_iter
+from src.momentum_weekly.io_utils import (
+    Columns,
+    columns_to_rows,
+    concat_columns,
+    num_rows,
+    read_columns,
+    scan_columns,
+    take_columns,
+    write_table,
+)
+from src.momentum_weekly.partitions import PartitionIndex, partition_layout
+from src.momentum_weekly.schedule import rebalance_spec, schedule_positions
+from src.momentum_weekly.signal_matrix import SignalMatrix, _to_date, build_signal_matrix
+from src.momentum_weekly.stage_cache import run_cached_stage
+
+BACKTEST_CONFIG_KEYS = [
+    "strategy.top_n",
+    "backtest.buy_cost",
+    "backtest.sell_cost",
+    "backtest.initial_nav",
+    "data.trading_days_per_year",
+    "backtest.start_date",
+    "backtest.end_date",
+    "backtest.daily_nav",
+    "strategy.rebalance",
+]
+DAILY_NAV_NAME = "daily_nav.parquet"
 
 
 def _std(values: list[float]) -> float:
@@ -26,123 +60,501 @@ def _sqrt(value: float) -> float:
     return value**0.5
 
 
-def load_signal_rows(signal_dir: Path) -> list[dict]:
+def _signal_files(signal_dir: Path) -> list[Path]:
     files = sorted(signal_dir.glob("signals_chunk_*.parquet"))
     if not files:
         raise FileNotFoundError("No signal files found. Please run signals.py first.")
-    rows: list[dict] = []
-    for file_path in files:
-        rows.extend(read_table(file_path))
-    rows.sort(key=lambda item: (item["date"], item["symbol"]))
-    return rows
+    return files
+
+
+def _ordered(merged: Iterable[tuple]) -> Iterator[tuple]:
+    previous: tuple | None = None
+    for row in merged:
+        key = (row[0], row[1])
+        if previous is not None and key < previous:
+            raise ValueError(f"Signal files are not sorted by (date, symbol) near {key}")
+        previous = key
+        yield row
+
+
+STREAM_COLUMNS = ["date", "symbol", "open", "score"]
+MATRIX_COLUMNS = ["date", "symbol", "open", "close", "score"]
+
+Keys = tuple[array, array]
+
+
+def signal_dictionaries(
+    signal_dir: Path, files: list[Path]
+) -> tuple[tuple[SymbolTable, TradingCalendar], list[Keys]]:
+    # prepare_data.py saves the dictionaries next to the signals directory.
+    return load_keys(signal_dir.parent, files)
+
+
+def _day_bounds(
+    calendar: TradingCalendar, window: tuple[date | None, date | None]
+) -> tuple[int, int]:
+    start, end = window
+    lower = bisect_left(calendar.days, start.isoformat()) if start is not None else 0
+    upper = bisect_right(calendar.days, end.isoformat()) if end is not None else len(calendar)
+    return lower, upper
+
+
+def _iter_file_rows(
+    file_path: Path, keys: Keys, bounds: tuple[int, int]
+) -> Iterator[tuple[int, int, float, float]]:
+    symbol_ids, day_ids = keys
+    start = bisect_left(day_ids, bounds[0])
+    stop = bisect_left(day_ids, bounds[1], start)
+    columns = scan_columns(file_path, ["open", "score"], start, stop)
+    yield from zip(day_ids[start:stop], symbol_ids[start:stop], columns["open"], columns["score"])
+
+
+def _merged_rows(
+    files: list[Path], file_keys: list[Keys], bounds: tuple[int, int]
+) -> Iterator[tuple[int, int, float, float]]:
+    # Every chunk (and delta part) is written sorted by (date, symbol), so a heap merge on
+    # the integer keys yields the global order without concatenating and re-sorting.
+    return _ordered(
+        heapq.merge(
+            *(_iter_file_rows(path, keys, bounds) for path, keys in zip(files, file_keys))
+        )
+    )
+
+
+def iter_signal_rows(
+    signal_dir: Path, window: tuple[date | None, date | None] = (None, None)
+) -> Iterator[tuple[str, str, float, float]]:
+    files = _signal_files(signal_dir)
+    (symbol_table, calendar), file_keys = signal_dictionaries(signal_dir, files)
+    for day_id, sid, open_price, score in _merged_rows(
+        files, file_keys, _day_bounds(calendar, window)
+    ):
+        yield calendar.days[day_id], symbol_table.symbols[sid], open_price, score
+
+
+CrossSection = tuple[int, date, list[str], list[float], list[float]]
+
+
+def iter_cross_sections(
+    signal_dir: Path,
+    window: tuple[date | None, date | None] = (None, None),
+    loaded: tuple[tuple[SymbolTable, TradingCalendar], list[Keys]] | None = None,
+) -> Iterator[CrossSection]:
+    files = _signal_files(signal_dir)
+    (symbol_table, calendar), file_keys = loaded or signal_dictionaries(signal_dir, files)
+    merged = _merged_rows(files, file_keys, _day_bounds(calendar, window))
+    names = symbol_table.symbols
+    # Positions are only compared with each other, so counting from the window start is fine.
+    grouped = groupby(merged, key=lambda row: row[0])
+    for day_pos, (day_id, rows) in enumerate(grouped):
+        symbols: list[str] = []
+        opens: list[float] = []
+        scores: list[float] = []
+        for _, sid, open_price, score in rows:
+            symbols.append(names[sid])
+            opens.append(float(open_price))
+            scores.append(float(score))
+        yield day_pos, calendar.dates[day_id], symbols, opens, scores
+
+
+def iter_partition_cross_sections(
+    signal_dir: Path,
+    window: tuple[date | None, date | None] = (None, None),
+    rebalance: str = "weekly",
+) -> Iterator[CrossSection]:
+    index = PartitionIndex(signal_dir, "signals")
+    trading_days = [_to_date(day) for day in index.dates]
+    needed = sorted(
+        {
+            pos + offset
+            for pos in rebalance_positions(trading_days, window, rebalance)
+            for offset in (0, 1)
+        }
+    )
+    needed_days = [index.dates[pos] for pos in needed]
+    print(
+        f"[backtest] partitions layout={index.layout} dates={len(needed)}/{len(trading_days)} "
+        f"files={len(index.files_for(needed_days))}"
+    )
+    tables = index.read_dates(needed_days, STREAM_COLUMNS)
+    for pos, raw_day in zip(needed, needed_days):
+        columns = tables[raw_day]
+        yield (
+            pos,
+            trading_days[pos],
+            [str(symbol) for symbol in columns["symbol"]],
+            [float(value) for value in columns["open"]],
+            [float(value) for value in columns["score"]],
+        )
+
+
+def load_signal_columns(signal_dir: Path) -> Columns:
+    files = _signal_files(signal_dir)
+    _, file_keys = signal_dictionaries(signal_dir, files)
+    tables = [read_columns(file_path, MATRIX_COLUMNS) for file_path in files]
+    offsets = accumulate((num_rows(table) for table in tables), initial=0)
+    order = [
+        row[2]
+        for row in _ordered(
+            heapq.merge(
+                *(
+                    zip(day_ids, symbol_ids, range(offset, offset + len(day_ids)))
+                    for (symbol_ids, day_ids), offset in zip(file_keys, offsets)
+                )
+            )
+        )
+    ]
+    return take_columns(concat_columns(tables), order)
+
+
+def load_signal_matrix(signal_dir: Path) -> SignalMatrix:
+    """Dense matrix of every signal file, placed by the files' dictionary codes (no merge)."""
+    files = _signal_files(signal_dir)
+    dictionaries, file_keys = signal_dictionaries(signal_dir, files)
+    matrix_columns = [name for name in MATRIX_COLUMNS if name not in ("date", "symbol")]
+    tables = [read_columns(file_path, matrix_columns) for file_path in files]
+    return build_signal_matrix(concat_columns(tables), dictionaries, concat_keys(file_keys))
+
+
+def load_signal_rows(signal_dir: Path) -> list[dict]:
+    return columns_to_rows(load_signal_columns(signal_dir))
+
+
+def weekly_rebalance_positions(trading_days: list[date]) -> list[int]:
+    return rebalance_positions(trading_days, rebalance="weekly")
 
 
-def run_backtest(cfg: dict, signal_rows: list[dict]) -> tuple[list[dict], list[dict]]:
+def backtest_window(cfg: dict) -> tuple[date | None, date | None]:
+    start = cfg["backtest"].get("start_date")
+    end = cfg["backtest"].get("end_date")
+    return (_to_date(start) if start else None, _to_date(end) if end else None)
+
+
+def _in_window(day: date, window: tuple[date | None, date | None]) -> bool:
+    start, end = window
+    return (start is None or day >= start) and (end is None or day <= end)
+
+
+def rebalance_positions(
+    trading_days: list[date],
+    window: tuple[date | None, date | None] = (None, None),
+    rebalance: str = "weekly",
+) -> list[int]:
+    """Signal-day positions of the schedule whose signal and trade day both fall in window."""
+    last = len(trading_days) - 1
+    return [
+        pos
+        for pos in schedule_positions(trading_days, rebalance)
+        if pos < last
+        and _in_window(trading_days[pos], window)
+        and _in_window(trading_days[pos + 1], window)
+    ]
+
+
+def rebalance_days(
+    trading_days: list[date],
+    window: tuple[date | None, date | None] = (None, None),
+    rebalance: str = "weekly",
+) -> set[date]:
+    return {trading_days[pos] for pos in rebalance_positions(trading_days, window, rebalance)}
+
+
+@dataclass
+class RankIndex:
+    depth: int
+    ranked: dict[int, list[int]]
+
+    def top(self, day_pos: int, top_n: int) -> list[int]:
+        if top_n > self.depth:
+            raise ValueError(f"RankIndex depth {self.depth} is smaller than top_n={top_n}")
+        return self.ranked.get(day_pos, [])[:top_n]
+
+
+def build_rank_index(
+    signals: Columns | SignalMatrix,
+    depth: int,
+    day_positions: Iterable[int] | None = None,
+) -> RankIndex:
+    matrix = signals if isinstance(signals, SignalMatrix) else build_signal_matrix(signals)
+    positions = range(matrix.num_days) if day_positions is None else day_positions
+
+    ranked: dict[int, list[int]] = {}
+    for day_pos in positions:
+        scores = matrix.row(matrix.score, day_pos)
+        present = [sid for sid, score in enumerate(scores) if score == score]
+        # Symbol ids follow symbol order, so nlargest keeps the previous tie order.
+        ranked[day_pos] = heapq.nlargest(depth, present, key=scores.__getitem__)
+    return RankIndex(depth=depth, ranked=ranked)
+
+
+def run_backtest(
+    cfg: dict,
+    signals: Columns | SignalMatrix,
+    rank_index: RankIndex | None = None,
+    daily_records: list[dict] | None = None,
+) -> tuple[list[dict], list[dict]]:
+    """Weekly period backtest; pass ``daily_records`` to also collect daily marked NAV."""
     top_n = int(cfg["strategy"]["top_n"])
     buy_cost = float(cfg["backtest"]["buy_cost"])
     sell_cost = float(cfg["backtest"]["sell_cost"])
-    initial_nav = float(cfg["backtest"]["initial_nav"])
-    trading_days_per_year = int(cfg["data"]["trading_days_per_year"])
+    nav = float(cfg["backtest"]["initial_nav"])
 
-    date_symbol_map: dict[date, dict[str, dict]] = {}
-    for row in signal_rows:
-        row_date = _to_date(row["date"])
-        date_symbol_map.setdefault(row_date, {})[str(row["symbol"])] = row
+    matrix = signals if isinstance(signals, SignalMatrix) else build_signal_matrix(signals)
+    trading_days = matrix.days
+    opens = matrix.open
 
-    trading_days = sorted(date_symbol_map.keys())
-    day_to_pos = {day: pos for pos, day in enumerate(trading_days)}
+    positions = rebalance_positions(trading_days, backtest_window(cfg), rebalance_spec(cfg))
+    if len(positions) < 2:
+        raise ValueError("Not enough rebalance dates to run backtest.")
 
-    rebalance_dates: list[date] = []
-    for day in trading_days:
-        if day.weekday() == 4 and day_to_pos[day] + 1 < len(trading_days):
-            rebalance_dates.append(day)
-    if len(rebalance_dates) < 2:
-        raise ValueError("Not enough weekly rebalance dates to run backtest.")
+    if rank_index is None:
+        rank_index = build_rank_index(matrix, top_n, positions)
 
-    nav = initial_nav
-    prev_weights: dict[str, float] = {}
+    prev_weights: dict[int, float] = {}
     records: list[dict] = []
+    marked_until: int | None = None
 
-    for idx in range(len(rebalance_dates) - 1):
-        signal_date = rebalance_dates[idx]
-        next_signal_date = rebalance_dates[idx + 1]
-
-        trade_date = trading_days[day_to_pos[signal_date] + 1]
-        next_trade_date = trading_days[day_to_pos[next_signal_date] + 1]
+    for idx in range(len(positions) - 1):
+        signal_pos = positions[idx]
+        trade_pos = signal_pos + 1
+        next_trade_pos = positions[idx + 1] + 1
 
-        signal_map = date_symbol_map.get(signal_date, {})
-        ranked = sorted(
-            signal_map.values(),
-            key=lambda item: float(item.get("score", 0.0)),
-            reverse=True,
-        )
-        selected_symbols = [str(item["symbol"]) for item in ranked[:top_n]]
-        if not selected_symbols:
+        selected_ids = rank_index.top(signal_pos, top_n)
+        if not selected_ids:
             continue
 
-        trade_map = date_symbol_map.get(trade_date, {})
-        next_trade_map = date_symbol_map.get(next_trade_date, {})
-        tradable_symbols: list[str] = []
-        for symbol in selected_symbols:
-            row_open = trade_map.get(symbol)
-            row_next_open = next_trade_map.get(symbol)
-            if not row_open or not row_next_open:
-                continue
-            open_price = float(row_open.get("open", 0.0))
-            next_open_price = float(row_next_open.get("open", 0.0))
-            if open_price <= 0.0 or next_open_price <= 0.0:
-                continue
-            tradable_symbols.append(symbol)
-
-        if not tradable_symbols:
+        trade_opens = matrix.row(opens, trade_pos)
+        next_trade_opens = matrix.row(opens, next_trade_pos)
+        tradable_ids = [
+            sid for sid in selected_ids if trade_opens[sid] > 0.0 and next_trade_opens[sid] > 0.0
+        ]
+        if not tradable_ids:
             continue
 
-        target_weight = 1.0 / len(tradable_symbols)
-        target_weights = {symbol: target_weight for symbol in tradable_symbols}
-
-        period_return = 0.0
-        for symbol in tradable_symbols:
-            open_price = float(trade_map[symbol]["open"])
-            next_open_price = float(next_trade_map[symbol]["open"])
-            stock_ret = next_open_price / open_price - 1.0
-            period_return += target_weight * stock_ret
-
-        symbols_all = set(prev_weights) | set(target_weights)
-        turnover = 0.0
-        buy_turnover = 0.0
-        sell_turnover = 0.0
-        for symbol in symbols_all:
-            old_w = prev_weights.get(symbol, 0.0)
-            new_w = target_weights.get(symbol, 0.0)
-            delta = new_w - old_w
-            abs_delta = abs(delta)
-            turnover += abs_delta
-            if delta > 0:
-                buy_turnover += delta
-            elif delta < 0:
-                sell_turnover += -delta
-
-        trading_cost = buy_turnover * buy_cost + sell_turnover * sell_cost
-        net_return = period_return - trading_cost
-        nav *= 1.0 + net_return
-
-        hold_days = float(day_to_pos[next_trade_date] - day_to_pos[trade_date])
-        records.append(
+        start_nav = nav
+        nav, prev_weights = _book_period(
+            records,
+            nav,
+            prev_weights,
+            tradable_ids,
+            [trade_opens[sid] for sid in tradable_ids],
+            [next_trade_opens[sid] for sid in tradable_ids],
+            (buy_cost, sell_cost),
+            (trading_days[signal_pos], trading_days[trade_pos], trading_days[next_trade_pos]),
+            float(next_trade_pos - trade_pos),
+        )
+        if daily_records is not None:
+            if marked_until is not None:
+                # No position between two booked periods: the book sits in cash.
+                for pos in range(marked_until, trade_pos):
+                    daily_records.append(
+                        {"date": trading_days[pos].isoformat(), "nav": start_nav, "holdings": 0}
+                    )
+            _mark_period(
+                daily_records,
+                matrix,
+                start_nav,
+                records[-1]["trading_cost"],
+                tradable_ids,
+                [trade_opens[sid] for sid in tradable_ids],
+                (trade_pos, next_trade_pos),
+            )
+            marked_until = next_trade_pos
+
+    return summarize_records(cfg, records)
+
+
+def run_backtest_streaming(
+    cfg: dict, cross_sections: Iterable[CrossSection], scheduled: Container[date]
+) -> tuple[list[dict], list[dict]]:
+    """Streaming engine; ``scheduled`` holds the signal days (see rebalance_days)."""
+    top_n = int(cfg["strategy"]["top_n"])
+    buy_cost = float(cfg["backtest"]["buy_cost"])
+    sell_cost = float(cfg["backtest"]["sell_cost"])
+    nav = float(cfg["backtest"]["initial_nav"])
+
+    prev_weights: dict[str, float] = {}
+    records: list[dict] = []
+    rebalance_count = 0
+    # Top-N picked on a signal day, waiting for the next trading day to open a period.
+    pending: tuple[date, list[str]] | None = None
+    # (signal_date, trade_date, trade_pos, selected symbols, their trade-date opens)
+    holding: tuple[date, date, int, list[str], list[float | None]] | None = None
+
+    for pos, day, symbols, opens, scores in cross_sections:
+        if pending is not None:
+            rebalance_count += 1
+            open_map = dict(zip(symbols, opens))
+            if holding is not None and holding[3]:
+                signal_day, trade_day, trade_pos, selected, trade_opens = holding
+                tradable = [
+                    (symbol, trade_open, open_map[symbol])
+                    for symbol, trade_open in zip(selected, trade_opens)
+                    if trade_open is not None
+                    and symbol in open_map
+                    and trade_open > 0.0
+                    and open_map[symbol] > 0.0
+                ]
+                if tradable:
+                    nav, prev_weights = _book_period(
+                        records,
+                        nav,
+                        prev_weights,
+                        [symbol for symbol, _, _ in tradable],
+                        [trade_open for _, trade_open, _ in tradable],
+                        [next_open for _, _, next_open in tradable],
+                        (buy_cost, sell_cost),
+                        (signal_day, trade_day, day),
+                        float(pos - trade_pos),
+                    )
+            signal_day, selected = pending
+            trade_opens = [open_map.get(symbol) for symbol in selected]
+            holding = (signal_day, day, pos, selected, trade_opens)
+            pending = None
+
+        if day in scheduled:
+            # Row order within a date is symbol order, so nlargest keeps the tie order.
+            present = [idx for idx, score in enumerate(scores) if score == score]
+            top_rows = heapq.nlargest(top_n, present, key=scores.__getitem__)
+            pending = (day, [symbols[idx] for idx in top_rows])
+
+    if rebalance_count < 2:
+        raise ValueError("Not enough rebalance dates to run backtest.")
+    return summarize_records(cfg, records)
+
+
+def _book_period(
+    records: list[dict],
+    nav: float,
+    prev_weights: dict,
+    holdings: list,
+    trade_opens: list[float],
+    next_trade_opens: list[float],
+    costs: tuple[float, float],
+    period_days: tuple[date, date, date],
+    hold_days: float,
+) -> tuple[float, dict]:
+    buy_cost, sell_cost = costs
+    signal_day, trade_day, next_trade_day = period_days
+
+    target_weight = 1.0 / len(holdings)
+    target_weights = dict.fromkeys(holdings, target_weight)
+
+    period_return = 0.0
+    for trade_open, next_open in zip(trade_opens, next_trade_opens):
+        period_return += target_weight * (next_open / trade_open - 1.0)
+
+    deltas = [
+        target_weights.get(key, 0.0) - prev_weights.get(key, 0.0)
+        for key in sorted(prev_weights.keys() | target_weights.keys())
+    ]
+    buy_turnover = sum(delta for delta in deltas if delta > 0)
+    sell_turnover = sum(-delta for delta in deltas if delta < 0)
+    turnover = sum(abs(delta) for delta in deltas)
+
+    trading_cost = buy_turnover * buy_cost + sell_turnover * sell_cost
+    net_return = period_return - trading_cost
+    nav *= 1.0 + net_return
+
+    records.append(
+        {
+            "signal_date": signal_day.isoformat(),
+            "trade_date": trade_day.isoformat(),
+            "next_trade_date": next_trade_day.isoformat(),
+            "hold_days": hold_days,
+            "gross_return": period_return,
+            "turnover": turnover,
+            "buy_turnover": buy_turnover,
+            "sell_turnover": sell_turnover,
+            "trading_cost": trading_cost,
+            "net_return": net_return,
+            "nav": nav,
+        }
+    )
+    return nav, target_weights
+
+
+def _mark_period(
+    daily_records: list[dict],
+    matrix: SignalMatrix,
+    start_nav: float,
+    trading_cost: float,
+    holdings: list[int],
+    trade_opens: list[float],
+    span: tuple[int, int],
+) -> None:
+    """Mark one holding period to market at every close in ``[trade_pos, next_trade_pos)``.
+
+    Works on the holdings x days block: each holding's closes are one strided slice of the
+    day-major close array, and close / trade_open is the cumulative product of its daily
+    returns. At the next trade open the value equals the period NAV booked by _book_period.
+    """
+    trade_pos, next_trade_pos = span
+    width = matrix.num_symbols
+    closes = matrix.close
+    totals: list[float] | None = None
+    for sid, trade_open in zip(holdings, trade_opens):
+        column = closes[trade_pos * width + sid : next_trade_pos * width + sid : width]
+        if any(map(isnan, column)):
+            column = _fill_forward(column, trade_open)
+        growth = map(truediv, column, repeat(trade_open))
+        totals = list(growth) if totals is None else list(map(add, totals, growth))
+
+    weight = 1.0 / len(holdings)
+    days = matrix.days[trade_pos:next_trade_pos]
+    count = len(holdings)
+    # Same arithmetic as the period NAV: nav * (1 + gross - cost), gross = weight * sum - 1.
+    for day, total in zip(days, totals or []):
+        daily_records.append(
             {
-                "signal_date": signal_date.isoformat(),
-                "trade_date": trade_date.isoformat(),
-                "next_trade_date": next_trade_date.isoformat(),
-                "hold_days": hold_days,
-                "gross_return": period_return,
-                "turnover": turnover,
-                "buy_turnover": buy_turnover,
-                "sell_turnover": sell_turnover,
-                "trading_cost": trading_cost,
-                "net_return": net_return,
-                "nav": nav,
+                "date": day.isoformat(),
+                "nav": start_nav * (weight * total - trading_cost),
+                "holdings": count,
             }
         )
-        prev_weights = target_weights
+
+
+def _fill_forward(column: array, first: float) -> list[float]:
+    filled: list[float] = []
+    last = first
+    for value in column:
+        if value == value and value > 0.0:
+            last = value
+        filled.append(last)
+    return filled
+
+
+def summarize_daily(cfg: dict, daily_records: list[dict]) -> list[dict]:
+    initial_nav = float(cfg["backtest"]["initial_nav"])
+    trading_days_per_year = int(cfg["data"]["trading_days_per_year"])
+    if not daily_records:
+        raise ValueError("Daily NAV is empty. Please check data and parameters.")
+
+    previous = initial_nav
+    running_max = 0.0
+    daily_returns: list[float] = []
+    for row in daily_records:
+        nav_value = float(row["nav"])
+        row["daily_return"] = nav_value / previous - 1.0 if previous > 0 else 0.0
+        running_max = max(running_max, nav_value)
+        row["cummax_nav"] = running_max
+        row["drawdown"] = nav_value / running_max - 1.0 if running_max > 0 else 0.0
+        daily_returns.append(row["daily_return"])
+        previous = nav_value
+
+    return [
+        {
+            "metric": "daily_annualized_volatility",
+            "value": _std(daily_returns) * _sqrt(trading_days_per_year),
+        },
+        {"metric": "daily_max_drawdown", "value": min(row["drawdown"] for row in daily_records)},
+        {"metric": "daily_worst_return", "value": min(daily_returns)},
+    ]
+
+
+def summarize_records(cfg: dict, records: list[dict]) -> tuple[list[dict], list[dict]]:
+    initial_nav = float(cfg["backtest"]["initial_nav"])
+    trading_days_per_year = int(cfg["data"]["trading_days_per_year"])
 
     if not records:
         raise ValueError("Backtest result is empty. Please check data and parameters.")
@@ -192,25 +604,89 @@ def run_backtest(cfg: dict, signal_rows: list[dict]) -> tuple[list[dict], list[d
     return records, metrics
 
 
-def main() -> None:
-    cfg = load_config("config.yaml")
-    signal_dir = Path(cfg["data"]["prepared_dir"]) / "signals"
-    result_dir = ensure_dir(cfg["backtest"]["result_dir"])
+def daily_nav_enabled(cfg: dict) -> bool:
+    return bool(cfg["backtest"].get("daily_nav", False))
 
-    signal_rows = load_signal_rows(signal_dir)
-    nav_rows, metrics_rows = run_backtest(cfg, signal_rows)
 
+def save_results(
+    result_dir: Path,
+    nav_rows: list[dict],
+    metrics_rows: list[dict],
+    daily_rows: list[dict] | None = None,
+) -> tuple[Path, Path]:
     nav_path = result_dir / "nav.parquet"
     metrics_path = result_dir / "metrics.parquet"
+    daily_path = result_dir / DAILY_NAV_NAME
     write_table(nav_path, nav_rows)
     write_table(metrics_path, metrics_rows)
+    if daily_rows is not None:
+        write_table(daily_path, daily_rows)
+    elif daily_path.exists():
+        daily_path.unlink()
+    return nav_path, metrics_path
+
 
-    print(f"[backtest] records={len(nav_rows)}")
-    print(f"[backtest] nav={nav_path}")
-    print(f"[backtest] metrics={metrics_path}")
+def main() -> None:
+    cfg = load_config("config.yaml")
+    signal_dir = Path(cfg["data"]["prepared_dir"]) / "signals"
+    result_dir = ensure_dir(cfg["backtest"]["result_dir"])
+
+    window = backtest_window(cfg)
+    rebalance = rebalance_spec(cfg)
+
+    def run() -> None:
+        daily_rows: list[dict] | None = None
+        if daily_nav_enabled(cfg):
+            # Daily marks need every close of every holding, so use the dense engine.
+            with phase("read") as timer:
+                matrix = load_signal_matrix(signal_dir)
+                timer.rows = matrix.num_days * matrix.num_symbols
+            with phase("compute") as timer:
+                daily_rows = []
+                nav_rows, metrics_rows = run_backtest(cfg, matrix, daily_records=daily_rows)
+                metrics_rows += summarize_daily(cfg, daily_rows)
+                timer.rows = matrix.num_days * matrix.num_symbols
+        else:
+            if partition_layout(cfg) == "chunk":
+                with phase("read"):
+                    loaded = signal_dictionaries(signal_dir, _signal_files(signal_dir))
+                trading_days = loaded[0][1].dates
+                cross_sections = iter_cross_sections(signal_dir, window, loaded)
+            else:
+                trading_days = [_to_date(day) for day in PartitionIndex(signal_dir, "signals").dates]
+                cross_sections = iter_partition_cross_sections(signal_dir, window, rebalance)
+            scheduled = rebalance_days(trading_days, window, rebalance)
+            with phase("compute") as timer:
+                # Cross sections are read lazily; the time spent producing them is charged
+                # to the read phase, not to compute.
+                nav_rows, metrics_rows = run_backtest_streaming(
+                    cfg,
+                    timed_iter("read", cross_sections, lambda section: len(section[2])),
+                    scheduled,
+                )
+                timer.rows = len(nav_rows)
+        with phase("write") as timer:
+            nav_path, metrics_path = save_results(result_dir, nav_rows, metrics_rows, daily_rows)
+            timer.rows = len(nav_rows) + len(metrics_rows)
+
+        print(f"[backtest] records={len(nav_rows)}")
+        if daily_rows is not None:
+            print(f"[backtest] daily_records={len(daily_rows)} -> {result_dir / DAILY_NAV_NAME}")
+        print(f"[backtest] nav={nav_path}")
+        print(f"[backtest] metrics={metrics_path}")
+
+    with stage_stats(cfg, "backtest") as stats:
+        stats.cached = run_cached_stage(
+            cfg,
+            "backtest",
+            BACKTEST_CONFIG_KEYS,
+            sorted(signal_dir.glob("signals_chunk_*.parquet")),
+            result_dir,
+            ["nav.parquet", "metrics.parquet", DAILY_NAV_NAME],
+            run,
+        )
     print("[backtest] done")
 
 
 if __name__ == "__main__":
     main()
-
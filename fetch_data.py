@@ -1,10 +1,41 @@
 from __future__ import annotations
 
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import date
+from datetime import timedelta
 from pathlib import Path
 
+from src.momentum_weekly.async_fetch import create_fetcher
 from src.momentum_weekly.config_utils import ensure_dir, load_config
 from src.momentum_weekly.data_provider import create_provider
-from src.momentum_weekly.io_utils import write_table
+from src.momentum_weekly.instrumentation import phase, stage_stats
+from src.momentum_weekly.io_utils import (
+    Columns,
+    concat_columns,
+    num_rows,
+    read_columns,
+    sort_columns,
+    write_columns,
+)
+from src.momentum_weekly.stage_cache import invalidate, run_cached_stage
+
+MANIFEST_NAME = "manifest.json"
+FETCH_CONFIG_KEYS = [
+    "project.seed",
+    "data.provider",
+    "data.start_date",
+    "data.end_date",
+    "data.num_stocks",
+    "data.fetch_chunk_size",
+    "data.http_base_url",
+]
 
 
 def chunked(items: list[str], size: int):
@@ -12,40 +43,332 @@ def chunked(items: list[str], size: int):
         yield items[idx : idx + size]
 
 
-def main() -> None:
-    cfg = load_config("config.yaml")
+def _manifest_source(cfg: dict) -> dict:
+    return {
+        "provider": str(cfg["data"]["provider"]).lower(),
+        "seed": int(cfg["project"]["seed"]),
+        "start_date": str(cfg["data"]["start_date"]),
+    }
+
+
+def load_manifest(raw_dir: Path, cfg: dict) -> dict[str, dict]:
+    manifest_path = raw_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    payload = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if not isinstance(payload, dict) or payload.get("source") != _manifest_source(cfg):
+        return {}
+    chunks = payload.get("chunks", [])
+    if not isinstance(chunks, list):
+        return {}
+    return {
+        str(item["file"]): item
+        for item in chunks
+        if isinstance(item, dict) and "file" in item and "end_date" in item
+    }
+
+
+def save_manifest(raw_dir: Path, cfg: dict, entries: list[dict]) -> Path:
+    manifest_path = raw_dir / MANIFEST_NAME
+    payload = {"source": _manifest_source(cfg), "chunks": entries}
+    manifest_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest_path
+
+
+def fetch_chunk_columns(cfg: dict, symbols: list[str]) -> Columns:
+    data_cfg = cfg["data"]
+    return create_provider(cfg).get_price_data(
+        symbols=symbols,
+        start_date=str(data_cfg["start_date"]),
+        end_date=str(data_cfg["end_date"]),
+        columnar=True,
+    )
+
+
+@dataclass
+class ChunkPlan:
+    file_path: Path
+    existing: Columns | None
+    requests: list[tuple[list[str], str, str]]
+    rewrite: bool = True
+
+
+def plan_chunk(
+    cfg: dict,
+    chunk_idx: int,
+    symbols: list[str],
+    raw_dir: Path,
+    covered: dict | None = None,
+) -> ChunkPlan:
+    data_cfg = cfg["data"]
+    start_date = str(data_cfg["start_date"])
+    end_date = str(data_cfg["end_date"])
+    file_path = raw_dir / f"prices_chunk_{chunk_idx:03d}.parquet"
+
+    if (
+        covered is None
+        or not covered.get("end_date")
+        or not file_path.exists()
+        or str(covered["end_date"]) > end_date
+    ):
+        return ChunkPlan(file_path, None, [(symbols, start_date, end_date)])
+
+    wanted = set(symbols)
+    known = [symbol for symbol in covered.get("symbols", []) if symbol in wanted]
+    known_set = set(known)
+    new_symbols = [symbol for symbol in symbols if symbol not in known_set]
+    tail_start = (date.fromisoformat(str(covered["end_date"])) + timedelta(days=1)).isoformat()
+
+    if len(known_set) < len(covered.get("symbols", [])):
+        existing = read_columns(file_path, filters=[("symbol", "in", known_set)])
+    else:
+        existing = read_columns(file_path)
+        if not new_symbols and tail_start > end_date:
+            return ChunkPlan(file_path, existing, [], rewrite=False)
+
+    requests: list[tuple[list[str], str, str]] = []
+    if known and tail_start <= end_date:
+        requests.append((known, tail_start, end_date))
+    if new_symbols:
+        requests.append((new_symbols, start_date, end_date))
+    return ChunkPlan(file_path, existing, requests)
+
+
+def split_requests(
+    requests: list[tuple[list[str], str, str]], batch_size: int
+) -> list[tuple[list[str], str, str]]:
+    if batch_size <= 0:
+        return requests
+    return [
+        (batch, start_date, end_date)
+        for symbols, start_date, end_date in requests
+        for batch in chunked(symbols, batch_size)
+    ]
+
+
+def _max_date(columns: Columns | None) -> str | None:
+    dates = columns.get("date") if columns else None
+    return str(max(dates)) if dates else None
+
+
+def write_chunk(plan: ChunkPlan, parts: list[Columns]) -> tuple[Path, int, int, str | None]:
+    """Write the chunk; also return the last date it really holds, for the manifest."""
+    if not plan.rewrite:
+        return plan.file_path, num_rows(plan.existing), 0, _max_date(plan.existing)
+
+    fetched = sum(num_rows(part) for part in parts)
+    if plan.existing is None and len(parts) == 1:
+        chunk_columns = parts[0]
+    else:
+        existing = [] if plan.existing is None else [plan.existing]
+        chunk_columns = sort_columns(concat_columns(existing + parts), ["symbol", "date"])
+    write_columns(plan.file_path, chunk_columns)
+    return plan.file_path, num_rows(chunk_columns), fetched, _max_date(chunk_columns)
+
+
+def provider_stats(provider: object) -> dict[str, int]:
+    return dict(getattr(provider, "stats", None) or {})
+
+
+def print_provider_stats(stats: dict[str, int]) -> None:
+    if stats:
+        counters = " ".join(f"{name}={count}" for name, count in sorted(stats.items()))
+        print(f"[fetch_data] provider_cache {counters}")
+
+
+def fetch_chunk(
+    cfg: dict,
+    chunk_idx: int,
+    symbols: list[str],
+    raw_dir: Path,
+    covered: dict | None = None,
+) -> tuple[Path, int, int, str | None, dict[str, int]]:
+    provider = create_provider(cfg)
+    plan = plan_chunk(cfg, chunk_idx, symbols, raw_dir, covered)
+    batch_size = int(cfg["data"].get("fetch_batch_size", 0) or 0)
+    with phase("read") as timer:
+        parts = [
+            provider.get_price_data(batch, start_date, end_date, columnar=True)
+            for batch, start_date, end_date in split_requests(plan.requests, batch_size)
+        ]
+        provider.close()
+        timer.rows = sum(num_rows(part) for part in parts)
+    with phase("write") as timer:
+        written = write_chunk(plan, parts)
+        timer.rows = written[2]
+    return (*written, provider_stats(provider))
+
+
+async def fetch_chunks_async(
+    cfg: dict, plans: list[ChunkPlan], concurrency: int
+) -> list[tuple[Path, int, int, str | None, dict[str, int]]]:
     provider = create_provider(cfg)
+    fetcher = create_fetcher(provider, cfg, concurrency)
+    batch_size = int(cfg["data"].get("fetch_batch_size", 0) or 0)
+    started = time.perf_counter()
+    with phase("read") as timer:
+        try:
+            # Requests from every chunk share one concurrency limit and one rate limiter.
+            parts_per_chunk = await asyncio.gather(
+                *(fetcher.fetch_all(split_requests(plan.requests, batch_size)) for plan in plans)
+            )
+        finally:
+            provider.close()
+        timer.rows = sum(num_rows(part) for parts in parts_per_chunk for part in parts)
+    elapsed = time.perf_counter() - started
+    print(
+        f"[fetch_data] async requests={fetcher.requests} retried={fetcher.retried} "
+        f"concurrency={concurrency} elapsed={elapsed:.2f}s"
+    )
+    print_provider_stats(provider_stats(provider))
+    # One provider served every chunk, so its counters are reported above, not per chunk.
+    with phase("write") as timer:
+        written = [write_chunk(plan, parts) for plan, parts in zip(plans, parts_per_chunk)]
+        timer.rows = sum(result[2] for result in written)
+    return [(*result, {}) for result in written]
 
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fetch price data into chunked tables.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: data.fetch_workers or 1)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="concurrent provider requests in async mode (default: data.fetch_concurrency)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        default=None,
+        help="fetch through the asyncio provider interface (default: data.fetch_async)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=None,
+        help="only fetch bars and symbols missing from the raw manifest "
+        "(default: data.fetch_incremental)",
+    )
+    return parser.parse_args(argv)
+
+
+def fetch_all(
+    cfg: dict,
+    raw_dir: Path,
+    workers: int,
+    incremental: bool,
+    use_async: bool = False,
+    concurrency: int = 8,
+) -> None:
+    provider = create_provider(cfg)
     data_cfg = cfg["data"]
-    raw_dir = ensure_dir(data_cfg["raw_dir"])
 
     symbols = provider.get_universe(int(data_cfg["num_stocks"]))
     chunk_size = int(data_cfg.get("fetch_chunk_size", 50))
+    manifest = load_manifest(raw_dir, cfg) if incremental else {}
+
+    chunks = list(chunked(symbols, chunk_size))
+    chunk_ids = list(range(1, len(chunks) + 1))
 
     chunk_files: list[Path] = []
-    print(f"[fetch_data] provider={data_cfg['provider']} symbols={len(symbols)}")
-    for chunk_idx, symbol_chunk in enumerate(chunked(symbols, chunk_size), start=1):
-        chunk_df = provider.get_price_data(
-            symbols=symbol_chunk,
-            start_date=str(data_cfg["start_date"]),
-            end_date=str(data_cfg["end_date"]),
+    chunk_end_dates: list[str | None] = []
+    print(
+        f"[fetch_data] provider={data_cfg['provider']} symbols={len(symbols)} "
+        f"workers={workers} incremental={incremental} async={use_async}"
+    )
+    covered = [manifest.get(f"prices_chunk_{chunk_idx:03d}.parquet") for chunk_idx in chunk_ids]
+    pool_size = 1 if use_async else min(workers, max(len(chunks), 1))
+    with ProcessPoolExecutor(max_workers=pool_size) if pool_size > 1 else nullcontext() as pool:
+        if use_async:
+            plans = [
+                plan_chunk(cfg, chunk_idx, symbol_chunk, raw_dir, chunk_covered)
+                for chunk_idx, symbol_chunk, chunk_covered in zip(chunk_ids, chunks, covered)
+            ]
+            results = asyncio.run(fetch_chunks_async(cfg, plans, max(1, concurrency)))
+        else:
+            tasks = ([cfg] * len(chunks), chunk_ids, chunks, [raw_dir] * len(chunks), covered)
+            mapper = pool.map if pool is not None else map
+            results = mapper(fetch_chunk, *tasks)
+        cache_stats: Counter = Counter()
+        for chunk_idx, (file_path, rows, fetched, max_date, stats) in zip(chunk_ids, results):
+            chunk_files.append(file_path)
+            chunk_end_dates.append(max_date)
+            cache_stats.update(stats)
+            print(
+                f"[fetch_data] chunk={chunk_idx:03d} rows={rows} fetched={fetched} file={file_path}"
+            )
+    print_provider_stats(cache_stats)
+
+    for stale in sorted(raw_dir.glob("prices_chunk_*.parquet")):
+        if stale not in chunk_files:
+            stale.unlink()
+    with phase("write"):
+        manifest_path = save_manifest(
+            raw_dir,
+            cfg,
+            [
+                {"file": file_path.name, "symbols": symbol_chunk, "end_date": max_date}
+                for file_path, symbol_chunk, max_date in zip(chunk_files, chunks, chunk_end_dates)
+            ],
+        )
+        universe_path = raw_dir / "universe.parquet"
+        write_columns(
+            universe_path,
+            {"symbol": symbols, "in_universe": [1] * len(symbols)},
         )
+    print(f"[fetch_data] universe file={universe_path}")
+    print(f"[fetch_data] manifest file={manifest_path}")
+    print(f"[fetch_data] total_chunks={len(chunk_files)}")
 
-        file_path = raw_dir / f"prices_chunk_{chunk_idx:03d}.parquet"
-        write_table(file_path, chunk_df)
-        chunk_files.append(file_path)
 
-        print(
-            f"[fetch_data] chunk={chunk_idx:03d} rows={len(chunk_df)} file={file_path}"
-        )
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    cfg = load_config("config.yaml")
+    data_cfg = cfg["data"]
+    raw_dir = ensure_dir(data_cfg["raw_dir"])
 
-    universe_path = raw_dir / "universe.parquet"
-    write_table(
-        universe_path,
-        [{"symbol": symbol, "in_universe": 1} for symbol in symbols],
+    workers = args.workers if args.workers is not None else int(data_cfg.get("fetch_workers", 1))
+    incremental = (
+        args.incremental
+        if args.incremental is not None
+        else bool(data_cfg.get("fetch_incremental", False))
     )
-    print(f"[fetch_data] universe file={universe_path}")
-    print(f"[fetch_data] done. total_chunks={len(chunk_files)}")
+    use_async = (
+        args.use_async if args.use_async is not None else bool(data_cfg.get("fetch_async", False))
+    )
+    concurrency = (
+        args.concurrency
+        if args.concurrency is not None
+        else int(data_cfg.get("fetch_concurrency", 8))
+    )
+
+    def run() -> None:
+        fetch_all(cfg, raw_dir, max(1, workers), incremental, use_async, concurrency)
+
+    with stage_stats(cfg, "fetch_data") as stats:
+        if str(data_cfg["provider"]).lower() != "mock":
+            # Only the mock provider is a pure function of the config; real providers
+            # publish new bars over time, so their output cannot be keyed on it.
+            invalidate(raw_dir, "fetch_data")
+            run()
+        else:
+            stats.cached = run_cached_stage(
+                cfg,
+                "fetch_data",
+                FETCH_CONFIG_KEYS,
+                [],
+                raw_dir,
+                ["prices_chunk_*.parquet", "universe.parquet", MANIFEST_NAME],
+                run,
+            )
+    print("[fetch_data] done")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from backtest import daily_nav_enabled, run_backtest, save_results, summarize_daily
+from fetch_data import chunked, fetch_chunk_columns, save_manifest
+from prepare_data import PREPARED_SORT_KEYS, prepare_chunk
+from report import write_report
+from signals import SIGNALS_OUTPUT_ORDER, compute_score_columns, save_signal_state
+from src.momentum_weekly.config_utils import ensure_dir, load_config
+from src.momentum_weekly.data_provider import create_provider
+from src.momentum_weekly.dictionaries import SymbolTable, TradingCalendar, save_dictionaries
+from src.momentum_weekly.instrumentation import phase, stage_stats
+from src.momentum_weekly.io_utils import Columns, concat_columns, num_rows, write_columns
+from src.momentum_weekly.partitions import clear_partitions, partition_layout, write_partitions
+from src.momentum_weekly.signal_matrix import build_signal_matrix
+from src.momentum_weekly.stage_cache import invalidate
+
+PERSIST_STAGES = ("raw", "prepared", "signals", "backtest")
+
+
+def _remove_stale_chunks(directory: Path, prefix: str, num_chunks: int) -> None:
+    """Drop ``<prefix>_NNN*`` files of chunks past the ones this run wrote."""
+    for path in directory.glob(f"{prefix}_*.parquet"):
+        index = path.stem[len(prefix) + 1 :][:3]
+        if not index.isdigit() or int(index) > num_chunks:
+            path.unlink()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run fetch -> prepare -> signals -> backtest -> report in one process."
+    )
+    parser.add_argument(
+        "--persist",
+        nargs="*",
+        default=[],
+        choices=PERSIST_STAGES + ("all",),
+        help="stage artifacts to also write to disk (default: none)",
+    )
+    parser.add_argument("--skip-report", action="store_true", help="stop after the backtest")
+    return parser.parse_args(argv)
+
+
+def run_pipeline(cfg: dict, persist: set[str]) -> tuple[list[dict], list[dict]]:
+    data_cfg = cfg["data"]
+    mom_windows = [int(x) for x in cfg["strategy"]["mom_windows"]]
+    weights = [float(x) for x in cfg["strategy"]["weights"]]
+    if len(mom_windows) != len(weights):
+        raise ValueError("mom_windows and weights length mismatch")
+    if any(window <= 0 for window in mom_windows):
+        raise ValueError("mom_windows must be positive")
+
+    provider = create_provider(cfg)
+    symbols = provider.get_universe(int(data_cfg["num_stocks"]))
+    chunks = list(chunked(symbols, int(data_cfg.get("fetch_chunk_size", 50))))
+
+    raw_dir = ensure_dir(data_cfg["raw_dir"]) if "raw" in persist else None
+    prepared_dir = ensure_dir(data_cfg["prepared_dir"]) if "prepared" in persist else None
+    signal_dir = (
+        ensure_dir(f"{data_cfg['prepared_dir']}/signals") if "signals" in persist else None
+    )
+    # Persisted files replace whatever the per-stage scripts cached there.
+    for output_dir, stage in (
+        (raw_dir, "fetch_data"),
+        (prepared_dir, "prepare_data"),
+        (signal_dir, "signals"),
+    ):
+        if output_dir is not None:
+            invalidate(output_dir, stage)
+
+    print(
+        f"[pipeline] symbols={len(symbols)} chunks={len(chunks)} "
+        f"persist={sorted(persist) or 'none'}"
+    )
+    layout = partition_layout(cfg)
+    prepared_chunks: list[Columns] = []
+    signal_chunks: list[Columns] = []
+    signal_states: dict[str, dict] = {}
+    trading_days: set[str] = set()
+    chunk_end_dates: list[str | None] = []
+    for chunk_idx, symbol_chunk in enumerate(chunks, start=1):
+        with phase("fetch") as timer:
+            raw = fetch_chunk_columns(cfg, symbol_chunk)
+            timer.rows = num_rows(raw)
+        chunk_end_dates.append(max(raw["date"]) if num_rows(raw) else None)
+        if raw_dir is not None:
+            with phase("write"):
+                write_columns(raw_dir / f"prices_chunk_{chunk_idx:03d}.parquet", raw)
+
+        with phase("prepare") as timer:
+            prepared = prepare_chunk(raw)
+            timer.rows = num_rows(prepared)
+        if prepared_dir is not None:
+            with phase("write"):
+                write_columns(
+                    prepared_dir / f"prepared_chunk_{chunk_idx:03d}.parquet",
+                    prepared,
+                    {"sorted_by": PREPARED_SORT_KEYS},
+                )
+            if layout != "chunk":
+                prepared_chunks.append(prepared)
+            trading_days.update(prepared["date"])
+
+        with phase("signals") as timer:
+            scored, symbol_states = compute_score_columns(
+                prepared, mom_windows, weights, sorted_by=PREPARED_SORT_KEYS
+            )
+            timer.rows = num_rows(prepared)
+        if signal_dir is not None:
+            signal_name = f"signals_chunk_{chunk_idx:03d}.parquet"
+            for stale in signal_dir.glob(f"signals_chunk_{chunk_idx:03d}_delta*.parquet"):
+                stale.unlink()
+            with phase("write"):
+                write_columns(
+                    signal_dir / signal_name, scored, {"sorted_by": SIGNALS_OUTPUT_ORDER}
+                )
+            signal_states[signal_name] = {"symbols": symbol_states, "parts": 0}
+
+        signal_chunks.append(scored)
+        print(f"[pipeline] chunk={chunk_idx:03d} rows={num_rows(scored)}")
+
+    universe = {"symbol": symbols, "in_universe": [1] * len(symbols)}
+    for output_dir, prefix in (
+        (raw_dir, "prices_chunk"),
+        (prepared_dir, "prepared_chunk"),
+        (signal_dir, "signals_chunk"),
+    ):
+        if output_dir is not None:
+            _remove_stale_chunks(output_dir, prefix, len(chunks))
+    if raw_dir is not None:
+        write_columns(raw_dir / "universe.parquet", universe)
+        save_manifest(
+            raw_dir,
+            cfg,
+            [
+                {
+                    "file": f"prices_chunk_{chunk_idx:03d}.parquet",
+                    "symbols": symbol_chunk,
+                    "end_date": max_date,
+                }
+                for chunk_idx, (symbol_chunk, max_date) in enumerate(
+                    zip(chunks, chunk_end_dates), start=1
+                )
+            ],
+        )
+    if prepared_dir is not None:
+        write_columns(prepared_dir / "universe.parquet", universe)
+        save_dictionaries(prepared_dir, SymbolTable(symbols), TradingCalendar(trading_days))
+        if layout == "chunk":
+            clear_partitions(prepared_dir, "prepared")
+        else:
+            write_partitions(prepared_dir, "prepared", concat_columns(prepared_chunks), layout)
+
+    signals = concat_columns(signal_chunks)
+    if signal_dir is not None:
+        save_signal_state(signal_dir, mom_windows, weights, signal_states)
+        if layout == "chunk":
+            clear_partitions(signal_dir, "signals")
+        else:
+            write_partitions(signal_dir, "signals", signals, layout)
+
+    with phase("backtest") as timer:
+        matrix = build_signal_matrix(signals)
+        daily_rows: list[dict] | None = [] if daily_nav_enabled(cfg) else None
+        nav_rows, metrics_rows = run_backtest(cfg, matrix, daily_records=daily_rows)
+        if daily_rows is not None:
+            metrics_rows += summarize_daily(cfg, daily_rows)
+        timer.rows = num_rows(signals)
+    print(f"[pipeline] backtest records={len(nav_rows)}")
+    if "backtest" in persist:
+        result_dir = ensure_dir(cfg["backtest"]["result_dir"])
+        invalidate(result_dir, "backtest")
+        nav_path, metrics_path = save_results(result_dir, nav_rows, metrics_rows, daily_rows)
+        print(f"[pipeline] nav={nav_path} metrics={metrics_path}")
+    return nav_rows, metrics_rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    cfg = load_config("config.yaml")
+    persist = set(PERSIST_STAGES) if "all" in args.persist else set(args.persist)
+
+    with stage_stats(cfg, "pipeline"):
+        nav_rows, metrics_rows = run_pipeline(cfg, persist)
+        if not args.skip_report:
+            with phase("write"):
+                write_report(cfg, [float(row["nav"]) for row in nav_rows], metrics_rows)
+    print("[pipeline] done")
+
+
+if __name__ == "__main__":
+    main()
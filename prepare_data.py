@@ -3,38 +3,117 @@ from __future__ import annotations
 from pathlib import Path
 
 from src.momentum_weekly.config_utils import ensure_dir, load_config
-from src.momentum_weekly.io_utils import read_table, write_table
+from src.momentum_weekly.dictionaries import (
+    DICTIONARIES_NAME,
+    SymbolTable,
+    TradingCalendar,
+    save_dictionaries,
+)
+from src.momentum_weekly.instrumentation import phase, stage_stats
+from src.momentum_weekly.io_utils import (
+    Columns,
+    concat_columns,
+    num_rows,
+    read_columns,
+    sort_columns,
+    write_columns,
+)
+from src.momentum_weekly.partitions import clear_partitions, partition_layout, write_partitions
+from src.momentum_weekly.stage_cache import run_cached_stage
 
 
-def main() -> None:
-    cfg = load_config("config.yaml")
-    raw_dir = Path(cfg["data"]["raw_dir"])
-    prepared_dir = ensure_dir(cfg["data"]["prepared_dir"])
+PREPARED_SORT_KEYS = ["symbol", "date"]
 
-    chunk_files = sorted(raw_dir.glob("prices_chunk_*.parquet"))
-    if not chunk_files:
-        raise FileNotFoundError(
-            "No raw chunk files found. Please run fetch_data.py first."
-        )
 
+def prepare_chunk(columns: Columns) -> Columns:
+    return sort_columns(columns, PREPARED_SORT_KEYS)
+
+
+def prepare_all(
+    raw_dir: Path, prepared_dir: Path, chunk_files: list[Path], layout: str = "chunk"
+) -> None:
     prepared_paths: list[Path] = []
-    print(f"[prepare_data] chunks={len(chunk_files)}")
+    prepared_chunks: list[Columns] = []
+    symbols: set[str] = set()
+    days: set[str] = set()
+    print(f"[prepare_data] chunks={len(chunk_files)} layout={layout}")
     for chunk_file in chunk_files:
-        rows = read_table(chunk_file)
-        rows.sort(key=lambda item: (item["symbol"], item["date"]))
+        with phase("read") as timer:
+            columns = read_columns(chunk_file)
+            timer.rows = num_rows(columns)
+        with phase("compute") as timer:
+            columns = prepare_chunk(columns)
+            timer.rows = num_rows(columns)
+        if layout != "chunk":
+            prepared_chunks.append(columns)
+        symbols.update(columns["symbol"])
+        days.update(columns["date"])
 
         out_file = prepared_dir / chunk_file.name.replace("prices_chunk", "prepared_chunk")
-        write_table(out_file, rows)
+        with phase("write") as timer:
+            write_columns(out_file, columns, {"sorted_by": PREPARED_SORT_KEYS})
+            timer.rows = num_rows(columns)
         prepared_paths.append(out_file)
-        print(f"[prepare_data] input={chunk_file.name} rows={len(rows)} -> {out_file.name}")
+        print(
+            f"[prepare_data] input={chunk_file.name} rows={num_rows(columns)} -> {out_file.name}"
+        )
 
     universe_src = raw_dir / "universe.parquet"
     if universe_src.exists():
         universe_dst = prepared_dir / "universe.parquet"
-        write_table(universe_dst, read_table(universe_src))
+        write_columns(universe_dst, read_columns(universe_src))
         print(f"[prepare_data] copied universe -> {universe_dst}")
 
-    print(f"[prepare_data] done. prepared_chunks={len(prepared_paths)}")
+    symbol_table, calendar = SymbolTable(symbols), TradingCalendar(days)
+    with phase("write"):
+        dictionaries_file = save_dictionaries(prepared_dir, symbol_table, calendar)
+    print(
+        f"[prepare_data] dictionaries symbols={len(symbol_table)} days={len(calendar)}"
+        f" -> {dictionaries_file.name}"
+    )
+
+    if layout == "chunk":
+        clear_partitions(prepared_dir, "prepared")
+    else:
+        with phase("write") as timer:
+            partitioned = concat_columns(prepared_chunks)
+            index_file = write_partitions(prepared_dir, "prepared", partitioned, layout)
+            timer.rows = num_rows(partitioned)
+        print(f"[prepare_data] partitions layout={layout} index={index_file}")
+
+    print(f"[prepare_data] prepared_chunks={len(prepared_paths)}")
+
+
+def main() -> None:
+    cfg = load_config("config.yaml")
+    raw_dir = Path(cfg["data"]["raw_dir"])
+    prepared_dir = ensure_dir(cfg["data"]["prepared_dir"])
+
+    chunk_files = sorted(raw_dir.glob("prices_chunk_*.parquet"))
+    if not chunk_files:
+        raise FileNotFoundError(
+            "No raw chunk files found. Please run fetch_data.py first."
+        )
+
+    universe_src = raw_dir / "universe.parquet"
+    layout = partition_layout(cfg)
+    with stage_stats(cfg, "prepare_data") as stats:
+        stats.cached = run_cached_stage(
+            cfg,
+            "prepare_data",
+            ["data.partition_layout"],
+            chunk_files + ([universe_src] if universe_src.exists() else []),
+            prepared_dir,
+            [
+                "prepared_chunk_*.parquet",
+                "universe.parquet",
+                "prepared_part_*.parquet",
+                "prepared_index.json",
+                DICTIONARIES_NAME,
+            ],
+            lambda: prepare_all(raw_dir, prepared_dir, chunk_files, layout),
+        )
+    print("[prepare_data] done")
 
 
 if __name__ == "__main__":
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import re
 import shutil
+from bisect import bisect_right
 from datetime import datetime
 from datetime import timezone
 from html import escape
 from pathlib import Path
 
 from src.momentum_weekly.config_utils import ensure_dir, load_config
-from src.momentum_weekly.io_utils import read_table
+from src.momentum_weekly.instrumentation import phase, stage_stats
+from src.momentum_weekly.io_utils import read_columns, read_table
 from src.momentum_weekly.plot_utils import save_nav_curve_png
+from src.momentum_weekly.schedule import describe_rebalance, rebalance_spec
 
 
 def format_pct(value: float) -> str:
@@ -25,7 +29,7 @@ def build_report_md(cfg: dict, metric_map: dict[str, float], figure_path: Path)
         "## 策略定义",
         "- 股票池：沪深300（当前为 mock 占位）",
         "- 信号：`score = 0.5 * mom60 + 0.5 * mom120`（t 日收盘计算）",
-        "- 调仓：每周一次，t+1 开盘成交",
+        f"- 调仓：{describe_rebalance(rebalance_spec(cfg))}，t+1 开盘成交",
         "- 成本：buy=0.0008, sell=0.0018",
         "",
         "## 回测指标",
@@ -96,7 +100,7 @@ def build_report_html(cfg: dict, metric_map: dict[str, float], image_rel_path: s
     <ul>
       <li>股票池：沪深300（当前为 mock 占位）</li>
       <li>信号：<code>score = 0.5 * mom60 + 0.5 * mom120</code>（t 日收盘计算）</li>
-      <li>调仓：每周一次，t+1 开盘成交</li>
+      <li>调仓：{escape(describe_rebalance(rebalance_spec(cfg)))}，t+1 开盘成交</li>
       <li>成本：buy=0.0008, sell=0.0018</li>
     </ul>
   </div>
@@ -135,18 +139,65 @@ def _resolve_report_id() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
 
 
-def _copy_assets(source_dir: Path, target_dir: Path) -> list[str]:
-    copied_asset_names: list[str] = []
+ASSET_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".svg"}
+HISTORY_INDEX_NAME = "history.json"
+HISTORY_LOG_NAME = "history.jsonl"
+HISTORY_PAGES_DIR = "history"
+OBJECTS_DIR = "assets/by-hash"
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _replace_with(source: Path, target: Path, link: bool) -> None:
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        if not link:
+            raise OSError("copy requested")
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def _store_assets(source_dir: Path, site_dir: Path) -> dict[str, str]:
+    """Copy report assets into the content-addressed store; returns name -> site path.
+
+    Identical files across runs (and across names) are stored once under their sha256."""
+    store_dir = ensure_dir(site_dir / OBJECTS_DIR)
+    stored: dict[str, str] = {}
     for source in sorted(source_dir.glob("*")):
-        if source.is_file() and source.suffix.lower() in {".png", ".jpg", ".jpeg", ".gif", ".svg"}:
-            target = target_dir / source.name
-            shutil.copy2(source, target)
-            copied_asset_names.append(source.name)
-    return copied_asset_names
+        if source.is_file() and source.suffix.lower() in ASSET_SUFFIXES:
+            target = store_dir / f"{_file_sha256(source)}{source.suffix.lower()}"
+            if not target.exists():
+                # Copied rather than linked: report files are rewritten in place.
+                _replace_with(source, target, link=False)
+            stored[source.name] = f"{OBJECTS_DIR}/{target.name}"
+    return stored
+
+
+def _update_latest_assets(site_dir: Path, stored: dict[str, str]) -> Path:
+    latest_assets_dir = ensure_dir(site_dir / "assets")
+    for stale in latest_assets_dir.iterdir():
+        if stale.is_file() and stale.name not in stored:
+            stale.unlink()
+    for name, object_path in stored.items():
+        source = site_dir / object_path
+        target = latest_assets_dir / name
+        if target.exists() and os.path.samefile(source, target):
+            continue
+        _replace_with(source, target, link=True)
+    return latest_assets_dir
 
 
 def _load_history(site_dir: Path) -> list[dict]:
-    history_path = site_dir / "history.json"
+    history_path = site_dir / HISTORY_INDEX_NAME
     if not history_path.exists():
         return []
     payload = json.loads(history_path.read_text(encoding="utf-8"))
@@ -161,31 +212,121 @@ def _load_history(site_dir: Path) -> list[dict]:
     return [item for item in reports if isinstance(item, dict)]
 
 
-def _save_history(site_dir: Path, history: list[dict]) -> Path:
-    history_path = site_dir / "history.json"
-    payload = {
-        "latest": history[0]["id"] if history else "",
-        "reports": history,
-    }
+def _history_line(entry: dict) -> bytes:
+    return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _save_history_index(site_dir: Path, index: dict) -> Path:
+    history_path = site_dir / HISTORY_INDEX_NAME
     history_path.write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2),
-        encoding="utf-8",
+        json.dumps(index, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
     )
     return history_path
 
 
-def _build_root_index(cfg: dict, history: list[dict]) -> str:
-    title = escape(str(cfg["report"]["title"]))
-    if not history:
-        return f"""<!doctype html>
-<html lang="zh-CN"><head><meta charset="utf-8"><title>{title}</title></head>
-<body><h1>{title}</h1><p>暂无历史报告。</p></body></html>"""
-
-    latest = history[0]
-    latest_path = escape(str(latest.get("path", "")))
+def _load_history_index(site_dir: Path, page_size: int) -> dict:
+    history_path = site_dir / HISTORY_INDEX_NAME
+    if history_path.exists():
+        payload = json.loads(history_path.read_text(encoding="utf-8"))
+        if isinstance(payload, dict) and payload.get("log") == HISTORY_LOG_NAME:
+            if "ids" not in payload:
+                payload["ids"] = _scan_history_ids(site_dir)
+            return payload
+
+    # First run, or a site published before the append-only log: seed the log with the
+    # legacy report list, oldest first.
+    legacy = sorted(_load_history(site_dir), key=lambda item: str(item.get("generated_at", "")))
+    index = {
+        "latest": "",
+        "count": 0,
+        "page_size": page_size,
+        "log": HISTORY_LOG_NAME,
+        "pages_dir": HISTORY_PAGES_DIR,
+        "page_offsets": [],
+        "ids": {},
+    }
+    (site_dir / HISTORY_LOG_NAME).write_bytes(b"")
+    for entry in legacy:
+        _append_history(site_dir, index, entry)
+    return index
+
+
+def _append_history(site_dir: Path, index: dict, entry: dict) -> None:
+    with (site_dir / HISTORY_LOG_NAME).open("ab") as handle:
+        handle.seek(0, os.SEEK_END)
+        if index["count"] % index["page_size"] == 0:
+            index["page_offsets"].append(handle.tell())
+        index["ids"][str(entry.get("id", ""))] = handle.tell()
+        handle.write(_history_line(entry))
+    index["count"] += 1
+    index["latest"] = str(entry.get("id", ""))
+
+
+def _drop_history_entry(site_dir: Path, index: dict, report_id: str) -> int | None:
+    """Remove an earlier entry of a re-published ``report_id``, as the full list used to.
+
+    The log is rewritten from the page holding that entry; that page is returned."""
+    position = index["ids"].pop(report_id, None)
+    if position is None:
+        return None
+
+    offsets = index["page_offsets"]
+    page = bisect_right(offsets, position) - 1
+    kept = [
+        entry
+        for current in range(page, len(offsets))
+        for entry in _read_history_page(site_dir, index, current)
+        if str(entry.get("id", "")) != report_id
+    ]
+    with (site_dir / HISTORY_LOG_NAME).open("r+b") as handle:
+        handle.truncate(offsets[page])
+    index["page_offsets"] = offsets[:page]
+    index["count"] = page * index["page_size"]
+    for entry in kept:
+        _append_history(site_dir, index, entry)
+    return page
+
+
+def _scan_history_ids(site_dir: Path) -> dict[str, int]:
+    """Report id -> byte offset of its log line, for indexes written before ids were kept."""
+    ids: dict[str, int] = {}
+    offset = 0
+    with (site_dir / HISTORY_LOG_NAME).open("rb") as handle:
+        for line in handle:
+            if line.strip():
+                ids[str(json.loads(line).get("id", ""))] = offset
+            offset += len(line)
+    return ids
+
+
+def _read_history_page(site_dir: Path, index: dict, page: int) -> list[dict]:
+    offsets = index["page_offsets"]
+    with (site_dir / HISTORY_LOG_NAME).open("rb") as handle:
+        handle.seek(offsets[page])
+        if page + 1 < len(offsets):
+            data = handle.read(offsets[page + 1] - offsets[page])
+        else:
+            data = handle.read()
+    return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+
+def _history_page_name(page: int) -> str:
+    return f"{HISTORY_PAGES_DIR}/page-{page + 1:04d}.html"
+
+
+_INDEX_STYLE = """    body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; margin: 32px auto; max-width: 1000px; line-height: 1.65; color: #1f2937; padding: 0 18px; }
+    h1, h2 { color: #111827; }
+    .card { border: 1px solid #e5e7eb; border-radius: 10px; padding: 16px; margin-bottom: 20px; background: #ffffff; }
+    table { border-collapse: collapse; width: 100%; }
+    th, td { border-bottom: 1px solid #e5e7eb; padding: 10px 8px; text-align: left; }
+    .actions a { display: inline-block; padding: 8px 12px; background: #2563eb; color: #fff; text-decoration: none; border-radius: 6px; }
+    .pages a { margin-right: 8px; }"""
+
+
+def _history_table(history: list[dict], prefix: str = "") -> str:
     rows = []
     for item in history:
-        path = escape(str(item.get("path", "")))
+        path = escape(prefix + str(item.get("path", "")))
         report_id = escape(str(item.get("id", "")))
         generated_at = escape(str(item.get("generated_at", "")))
         commit = escape(str(item.get("commit", "")))
@@ -194,6 +335,66 @@ def _build_root_index(cfg: dict, history: list[dict]) -> str:
             f"<tr><td><a href=\"{path}\">{report_id}</a></td><td>{generated_at}</td><td>{commit_text}</td></tr>"
         )
     table_rows = "\n".join(rows)
+    return f"""<table>
+      <thead><tr><th>报告 ID</th><th>生成时间(UTC)</th><th>Commit</th></tr></thead>
+      <tbody>
+      {table_rows}
+      </tbody>
+    </table>"""
+
+
+def _page_links(pages: int, prefix: str = "") -> str:
+    links = " ".join(
+        f'<a href="{escape(prefix + _history_page_name(page))}">第 {page + 1} 页</a>'
+        for page in reversed(range(pages))
+    )
+    return f'<p class="pages">{links}</p>'
+
+
+def _build_history_page(cfg: dict, history: list[dict], page: int) -> str:
+    title = escape(str(cfg["report"]["title"]))
+    older = (
+        f'<a href="{escape(Path(_history_page_name(page - 1)).name)}">更早</a>' if page > 0 else ""
+    )
+    return f"""<!doctype html>
+<html lang="zh-CN">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
+  <title>{title} - 历史报告 第 {page + 1} 页</title>
+  <style>
+{_INDEX_STYLE}
+  </style>
+</head>
+<body>
+  <h1>{title} - 历史报告 第 {page + 1} 页</h1>
+  <div class="card">
+    <p class="pages"><a href="../index.html">返回历史首页</a> {older}</p>
+    {_history_table(history, "../")}
+  </div>
+</body>
+</html>
+"""
+
+
+def _build_root_index(cfg: dict, history: list[dict], pages: int = 0) -> str:
+    title = escape(str(cfg["report"]["title"]))
+    if not history:
+        return f"""<!doctype html>
+<html lang="zh-CN"><head><meta charset="utf-8"><title>{title}</title></head>
+<body><h1>{title}</h1><p>暂无历史报告。</p></body></html>"""
+
+    latest = history[0]
+    latest_path = escape(str(latest.get("path", "")))
+    archive = (
+        f"""
+  <div class="card">
+    <h2>全部历史</h2>
+    {_page_links(pages)}
+  </div>"""
+        if pages
+        else ""
+    )
     return f"""<!doctype html>
 <html lang="zh-CN">
 <head>
@@ -201,12 +402,7 @@ def _build_root_index(cfg: dict, history: list[dict]) -> str:
   <meta name="viewport" content="width=device-width, initial-scale=1" />
   <title>{title} - 历史报告</title>
   <style>
-    body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; margin: 32px auto; max-width: 1000px; line-height: 1.65; color: #1f2937; padding: 0 18px; }}
-    h1, h2 {{ color: #111827; }}
-    .card {{ border: 1px solid #e5e7eb; border-radius: 10px; padding: 16px; margin-bottom: 20px; background: #ffffff; }}
-    table {{ border-collapse: collapse; width: 100%; }}
-    th, td {{ border-bottom: 1px solid #e5e7eb; padding: 10px 8px; text-align: left; }}
-    .actions a {{ display: inline-block; padding: 8px 12px; background: #2563eb; color: #fff; text-decoration: none; border-radius: 6px; }}
+{_INDEX_STYLE}
   </style>
 </head>
 <body>
@@ -217,14 +413,9 @@ def _build_root_index(cfg: dict, history: list[dict]) -> str:
     <p class="actions"><a href="{latest_path}">打开最新报告</a></p>
   </div>
   <div class="card">
-    <h2>历史列表</h2>
-    <table>
-      <thead><tr><th>报告 ID</th><th>生成时间(UTC)</th><th>Commit</th></tr></thead>
-      <tbody>
-      {table_rows}
-      </tbody>
-    </table>
-  </div>
+    <h2>最近报告</h2>
+    {_history_table(history)}
+  </div>{archive}
   <script>
     setTimeout(function () {{
       window.location.href = "{latest_path}";
@@ -238,62 +429,64 @@ def _build_root_index(cfg: dict, history: list[dict]) -> str:
 def build_site(report_dir: Path, site_dir: Path, metric_map: dict[str, float], cfg: dict) -> tuple[Path, Path, Path]:
     report_id = _resolve_report_id()
     report_site_dir = ensure_dir(site_dir / "reports" / report_id)
-    report_assets_dir = ensure_dir(report_site_dir / "assets")
 
-    copied_asset_names = _copy_assets(report_dir, report_assets_dir)
-    if not copied_asset_names:
+    # Only this run's files are written: its report page, new asset objects, the tail
+    # of the history log, the last history page and the root index.
+    stored_assets = _store_assets(report_dir, site_dir)
+    if not stored_assets:
         raise FileNotFoundError("No static assets found in outputs/report to publish.")
+    _update_latest_assets(site_dir, stored_assets)
 
-    latest_assets_dir = site_dir / "assets"
-    if latest_assets_dir.exists():
-        shutil.rmtree(latest_assets_dir)
-    latest_assets_dir = ensure_dir(latest_assets_dir)
-    _copy_assets(report_dir, latest_assets_dir)
-
-    preferred_name = "nav_curve.png" if "nav_curve.png" in copied_asset_names else copied_asset_names[0]
-    html_text = build_report_html(cfg, metric_map, f"assets/{preferred_name}")
+    preferred_name = "nav_curve.png" if "nav_curve.png" in stored_assets else next(iter(stored_assets))
+    html_text = build_report_html(cfg, metric_map, f"../../{stored_assets[preferred_name]}")
     report_index_path = report_site_dir / "index.html"
     report_index_path.write_text(html_text, encoding="utf-8")
 
-    history = _load_history(site_dir)
-    history = [item for item in history if str(item.get("id", "")) != report_id]
-    history.append(
+    page_size = max(1, int(cfg["report"].get("site_page_size", 50)))
+    index = _load_history_index(site_dir, page_size)
+    changed_page = _drop_history_entry(site_dir, index, report_id)
+    _append_history(
+        site_dir,
+        index,
         {
             "id": report_id,
             "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
             "commit": os.getenv("GITHUB_SHA", ""),
             "path": f"reports/{report_id}/index.html",
-            "assets": copied_asset_names,
-        }
+            "assets": stored_assets,
+        },
     )
-    history.sort(key=lambda item: str(item.get("generated_at", "")), reverse=True)
+    history_path = _save_history_index(site_dir, index)
+
+    pages = len(index["page_offsets"])
+    ensure_dir(site_dir / HISTORY_PAGES_DIR)
+    first_page = pages - 1 if changed_page is None else changed_page
+    for page in range(first_page, pages):
+        entries = _read_history_page(site_dir, index, page)
+        (site_dir / _history_page_name(page)).write_text(
+            _build_history_page(cfg, entries[::-1], page), encoding="utf-8"
+        )
+    last_page = entries
 
-    history_path = _save_history(site_dir, history)
-    root_index_text = _build_root_index(cfg, history)
+    recent = last_page if pages == 1 else _read_history_page(site_dir, index, pages - 2) + last_page
+    recent = recent[::-1][: index["page_size"]]
     site_index_path = site_dir / "index.html"
-    site_index_path.write_text(root_index_text, encoding="utf-8")
+    site_index_path.write_text(_build_root_index(cfg, recent, pages), encoding="utf-8")
     return report_index_path, site_index_path, history_path
 
 
-def main() -> None:
-    cfg = load_config("config.yaml")
-    result_dir = Path(cfg["backtest"]["result_dir"])
+def write_report(cfg: dict, nav_values: list[float], metrics_rows: list[dict]) -> None:
     report_dir = ensure_dir(cfg["report"]["report_dir"])
     site_dir = ensure_dir("outputs/site")
 
-    nav_path = result_dir / "nav.parquet"
-    metrics_path = result_dir / "metrics.parquet"
-    if not nav_path.exists() or not metrics_path.exists():
-        raise FileNotFoundError("Backtest outputs missing. Please run backtest.py first.")
-
-    nav_rows = read_table(nav_path)
-    metrics_rows = read_table(metrics_path)
-
-    nav_rows.sort(key=lambda item: item["trade_date"])
-    nav_values = [float(item["nav"]) for item in nav_rows]
-
     fig_path = report_dir / "nav_curve.png"
-    save_nav_curve_png(fig_path, nav_values)
+    with phase("render") as timer:
+        save_nav_curve_png(
+            fig_path,
+            nav_values,
+            compression_level=int(cfg["report"].get("png_compression_level", 6)),
+        )
+        timer.rows = len(nav_values)
 
     metric_map = {str(item["metric"]): float(item["value"]) for item in metrics_rows}
     report_text = build_report_md(cfg, metric_map, fig_path)
@@ -309,6 +502,30 @@ def main() -> None:
     print(f"[report] site_report={site_report_path}")
     print(f"[report] site_index={site_index_path}")
     print(f"[report] site_history={site_history_path}")
+
+
+def main() -> None:
+    cfg = load_config("config.yaml")
+    result_dir = Path(cfg["backtest"]["result_dir"])
+
+    nav_path = result_dir / "nav.parquet"
+    metrics_path = result_dir / "metrics.parquet"
+    if not nav_path.exists() or not metrics_path.exists():
+        raise FileNotFoundError("Backtest outputs missing. Please run backtest.py first.")
+
+    with stage_stats(cfg, "report"):
+        with phase("read") as timer:
+            nav_columns = read_columns(nav_path, columns=["trade_date", "nav"])
+            metrics_rows = read_table(metrics_path)
+            timer.rows = len(nav_columns["trade_date"])
+
+        trade_dates = nav_columns["trade_date"]
+        order = sorted(range(len(trade_dates)), key=trade_dates.__getitem__)
+        nav_values = [float(nav_columns["nav"][idx]) for idx in order]
+
+        with phase("write") as timer:
+            write_report(cfg, nav_values, metrics_rows)
+            timer.rows = len(nav_values)
     print("[report] done")
 
 
@@ -1,61 +1,330 @@
 from __future__ import annotations
 
+import argparse
+import json
+from array import array
+from bisect import bisect_right
 from pathlib import Path
+from typing import Sequence
 
 from src.momentum_weekly.config_utils import ensure_dir, load_config
-from src.momentum_weekly.io_utils import read_table, write_table
+from src.momentum_weekly.dictionaries import (
+    SymbolTable,
+    TradingCalendar,
+    build_dictionaries,
+    load_dictionaries,
+    read_keys,
+)
+from src.momentum_weekly.instrumentation import phase, stage_stats
+from src.momentum_weekly.io_utils import (
+    Columns,
+    columns_to_rows,
+    concat_columns,
+    num_rows,
+    read_columns,
+    read_metadata,
+    rows_to_columns,
+    take_columns,
+    write_columns,
+)
+from src.momentum_weekly.partitions import clear_partitions, partition_layout, write_partitions
+from src.momentum_weekly.signal_matrix import NAN, SignalMatrix
+from src.momentum_weekly.stage_cache import run_cached_stage
 
+STATE_NAME = "signals_state.json"
+SCORE_INPUT_ORDER = ["symbol", "date"]
+SIGNALS_OUTPUT_ORDER = ["date", "symbol"]
+SIGNALS_CONFIG_KEYS = ["strategy.mom_windows", "strategy.weights", "data.partition_layout"]
 
-def _to_float(value: object) -> float:
-    return float(value)
 
+class StaleSignalState(ValueError):
+    """A saved per-symbol tail no longer matches the prepared closes it was built from."""
 
-def _pct_change(closes: list[float], idx: int, window: int) -> float:
-    if idx < window:
-        return 0.0
-    base = closes[idx - window]
-    if base == 0:
-        return 0.0
-    return closes[idx] / base - 1.0
 
+def _momentum_series(closes: Sequence[float], window: int) -> list[float]:
+    head = [0.0] * min(window, len(closes))
+    return head + [
+        0.0 if base == 0 else close / base - 1.0
+        for close, base in zip(closes[window:], closes[:-window])
+    ]
 
-def compute_scores(rows: list[dict], mom_windows: list[int], weights: list[float]) -> list[dict]:
-    rows.sort(key=lambda item: (item["symbol"], item["date"]))
-    result: list[dict] = []
-
-    current_symbol = None
-    symbol_rows: list[dict] = []
-
-    def flush_symbol(data_rows: list[dict]) -> None:
-        if not data_rows:
-            return
-        closes = [_to_float(item["close"]) for item in data_rows]
-        for idx, item in enumerate(data_rows):
-            enriched = dict(item)
-            score = 0.0
+
+def compute_score_columns(
+    columns: Columns,
+    mom_windows: list[int],
+    weights: list[float],
+    states: dict[str, dict] | None = None,
+    sorted_by: Sequence[str] | None = None,
+    dictionaries: tuple[SymbolTable, TradingCalendar] | None = None,
+    keys: tuple[array, array] | None = None,
+) -> tuple[Columns, dict[str, dict]]:
+    states = states or {}
+    if not num_rows(columns):
+        if states:
+            raise StaleSignalState(min(states))
+        return {}, {}
+    symbol_table, calendar = dictionaries or build_dictionaries([columns])
+    if keys is None:
+        keys = (symbol_table.encode(columns["symbol"]), calendar.encode(columns["date"]))
+    symbol_ids, days = keys
+
+    if list(sorted_by or []) != SCORE_INPUT_ORDER:
+        width = len(calendar)
+        combined = [sid * width + day for sid, day in zip(symbol_ids, days)]
+        if any(later < earlier for earlier, later in zip(combined, combined[1:])):
+            order = sorted(range(len(combined)), key=combined.__getitem__)
+            columns = take_columns(columns, order)
+            symbol_ids = array("i", [symbol_ids[idx] for idx in order])
+            days = array("i", [days[idx] for idx in order])
+    # Shallow copy: score columns are added below and the caller's table must stay as is.
+    columns = dict(columns)
+    closes = columns["close"]
+    total = num_rows(columns)
+    tail_size = max(mom_windows) if mom_windows else 0
+
+    keep: list[int] = []
+    mom_columns = {window: array("d", bytes(8 * total)) for window in mom_windows}
+    scores = array("d", bytes(8 * total))
+    new_states: dict[str, dict] = {}
+
+    start = 0
+    while start < total:
+        sid = symbol_ids[start]
+        end = start
+        while end < total and symbol_ids[end] == sid:
+            end += 1
+        symbol = symbol_table.symbols[sid]
+
+        state = states.get(symbol)
+        if state is None:
+            tail: list[float] = []
+            seen = 0
+            first = start
+        else:
+            tail = [float(value) for value in state["tail"]]
+            seen = int(state["count"])
+            last_day = calendar.last_on_or_before(str(state["last_date"]))
+            first = bisect_right(days, last_day, start, end)
+            # The tail must still be the closes right before the new bars; otherwise the
+            # prepared data was rebuilt (other seed/provider) and the state is someone else's.
+            history = first - start
+            if (
+                history < len(tail)
+                or (seen == len(tail) and history != len(tail))
+                or [float(value) for value in closes[first - len(tail) : first]] != tail
+            ):
+                raise StaleSignalState(symbol)
+
+        if first < end:
+            series = tail + [float(value) for value in closes[first:end]]
+            offset = len(tail)
+            score_series = [0.0] * (end - first)
             for window, weight in zip(mom_windows, weights):
-                mom = _pct_change(closes, idx, window)
-                enriched[f"mom{window}"] = mom
-                score += weight * mom
-            enriched["score"] = score
-            result.append(enriched)
-
-    for row in rows:
-        symbol = row["symbol"]
-        if current_symbol is None:
-            current_symbol = symbol
-        if symbol != current_symbol:
-            flush_symbol(symbol_rows)
-            symbol_rows = []
-            current_symbol = symbol
-        symbol_rows.append(row)
-
-    flush_symbol(symbol_rows)
-    result.sort(key=lambda item: (item["date"], item["symbol"]))
-    return result
-
-
-def main() -> None:
+                mom = _momentum_series(series, window)[offset:]
+                mom_columns[window][first:end] = array("d", mom)
+                score_series = [score + weight * value for score, value in zip(score_series, mom)]
+            scores[first:end] = array("d", score_series)
+            keep.extend(range(first, end))
+            new_tail = series[-tail_size:] if tail_size else []
+            new_states[symbol] = {
+                "last_date": calendar.days[days[end - 1]],
+                "tail_start": calendar.days[days[end - len(new_tail)]] if new_tail else None,
+                "count": seen + (end - first),
+                "tail": new_tail,
+            }
+        elif state is not None:
+            new_states[symbol] = state
+        start = end
+
+    # A saved symbol that left the chunk still has rows in the earlier output files.
+    dropped = states.keys() - new_states.keys()
+    if dropped:
+        raise StaleSignalState(min(dropped))
+
+    for window in mom_windows:
+        columns[f"mom{window}"] = mom_columns[window]
+    columns["score"] = scores
+
+    # Stable sort on the day index keeps symbol order within each date.
+    date_order = sorted(keep, key=days.__getitem__)
+    return take_columns(columns, date_order), new_states
+
+
+def compute_momentum_matrix(matrix: SignalMatrix, window: int) -> array:
+    width = matrix.num_symbols
+    momentum = array("d", [NAN]) * (matrix.num_days * width)
+    for sid in range(width):
+        closes = matrix.column(matrix.close, sid)
+        positions = [pos for pos, close in enumerate(closes) if close == close]
+        series = _momentum_series([closes[pos] for pos in positions], window)
+        for pos, value in zip(positions, series):
+            momentum[pos * width + sid] = value
+    return momentum
+
+
+def combine_momentum(
+    matrix: SignalMatrix,
+    momentum: dict[int, array],
+    mom_windows: list[int],
+    weights: list[float],
+) -> SignalMatrix:
+    scores = array("d", bytes(8 * matrix.num_days * matrix.num_symbols))
+    for window, weight in zip(mom_windows, weights):
+        scores = array("d", [score + weight * value for score, value in zip(scores, momentum[window])])
+    return matrix.with_scores(scores)
+
+
+def compute_scores(rows: list[dict], mom_windows: list[int], weights: list[float]) -> list[dict]:
+    result, _ = compute_score_columns(rows_to_columns(rows), mom_windows, weights)
+    return columns_to_rows(result)
+
+
+def load_signal_state(signal_dir: Path, mom_windows: list[int], weights: list[float]) -> dict[str, dict]:
+    state_path = signal_dir / STATE_NAME
+    if not state_path.exists():
+        return {}
+    payload = json.loads(state_path.read_text(encoding="utf-8"))
+    if not isinstance(payload, dict):
+        return {}
+    if payload.get("mom_windows") != mom_windows or payload.get("weights") != weights:
+        return {}
+    chunks = payload.get("chunks", {})
+    return chunks if isinstance(chunks, dict) else {}
+
+
+def save_signal_state(
+    signal_dir: Path,
+    mom_windows: list[int],
+    weights: list[float],
+    chunks: dict[str, dict],
+) -> Path:
+    state_path = signal_dir / STATE_NAME
+    payload = {"mom_windows": mom_windows, "weights": weights, "chunks": chunks}
+    state_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    return state_path
+
+
+def _tail_cutoff(symbol_states: dict[str, dict] | None) -> str | None:
+    """Earliest date a saved tail starts on: older prepared rows cannot change new scores."""
+    if not symbol_states:
+        return None
+    starts = [state.get("tail_start") for state in symbol_states.values()]
+    if None in starts:
+        return None
+    return min(starts)
+
+
+def _read_prepared(
+    path: Path, dictionaries: tuple[SymbolTable, TradingCalendar], cutoff: str | None
+) -> tuple[Columns, tuple[array, array] | None]:
+    if cutoff is None:
+        return read_columns(path), read_keys(path, *dictionaries)
+    return read_columns(path, filters=[("date", ">=", cutoff)]), None
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compute momentum scores for prepared chunks.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only score bars newer than the saved per-symbol state and append them",
+    )
+    return parser.parse_args(argv)
+
+
+def score_all(
+    signal_dir: Path,
+    prepared_files: list[Path],
+    mom_windows: list[int],
+    weights: list[float],
+    incremental: bool,
+    layout: str = "chunk",
+) -> None:
+    chunk_states = load_signal_state(signal_dir, mom_windows, weights) if incremental else {}
+    print(
+        "[signals] windows=%s weights=%s chunks=%d incremental=%s"
+        % (mom_windows, weights, len(prepared_files), incremental)
+    )
+    with phase("read"):
+        dictionaries = load_dictionaries(prepared_files[0].parent) or build_dictionaries(
+            read_columns(path, columns=["symbol", "date"]) for path in prepared_files
+        )
+    generated = 0
+    new_chunk_states: dict[str, dict] = {}
+    for prepared_file in prepared_files:
+        out_name = prepared_file.name.replace("prepared_chunk", "signals_chunk")
+        out_file = signal_dir / out_name
+        chunk_state = chunk_states.get(out_name) if out_file.exists() else None
+
+        symbol_states_in = None if chunk_state is None else chunk_state["symbols"]
+        cutoff = _tail_cutoff(symbol_states_in)
+        with phase("read") as timer:
+            # Extending saved tails only needs the rows from the oldest tail onwards.
+            columns, keys = _read_prepared(prepared_file, dictionaries, cutoff)
+            if cutoff is not None and (
+                not num_rows(columns) or not set(columns["symbol"]) <= symbol_states_in.keys()
+            ):
+                # A symbol without state needs its whole history; no rows means a rebuild.
+                cutoff = None
+                columns, keys = _read_prepared(prepared_file, dictionaries, cutoff)
+            sorted_by = read_metadata(prepared_file).get("sorted_by")
+            timer.rows = num_rows(columns)
+        with phase("compute") as timer:
+            try:
+                out_columns, symbol_states = compute_score_columns(
+                    columns, mom_windows, weights, symbol_states_in, sorted_by, dictionaries, keys
+                )
+            except StaleSignalState as exc:
+                print(
+                    f"[signals] {prepared_file.name} state does not match prepared data "
+                    f"(symbol={exc}), full recompute"
+                )
+                chunk_state = None
+                if cutoff is not None:
+                    columns, keys = _read_prepared(prepared_file, dictionaries, None)
+                out_columns, symbol_states = compute_score_columns(
+                    columns, mom_windows, weights, None, sorted_by, dictionaries, keys
+                )
+            timer.rows = num_rows(columns)
+        with phase("write") as timer:
+            if chunk_state is None:
+                for stale in signal_dir.glob(f"{out_file.stem}_delta*.parquet"):
+                    stale.unlink()
+                write_columns(out_file, out_columns, {"sorted_by": SIGNALS_OUTPUT_ORDER})
+                parts = 0
+            else:
+                parts = int(chunk_state.get("parts", 0))
+                if num_rows(out_columns):
+                    parts += 1
+                    out_file = signal_dir / f"{out_file.stem}_delta{parts:03d}.parquet"
+                    write_columns(out_file, out_columns, {"sorted_by": SIGNALS_OUTPUT_ORDER})
+            timer.rows = num_rows(out_columns)
+
+        new_chunk_states[out_name] = {"symbols": symbol_states, "parts": parts}
+        generated += 1
+        print(f"[signals] {prepared_file.name} rows={num_rows(out_columns)} -> {out_file.name}")
+
+    with phase("write"):
+        save_signal_state(signal_dir, mom_windows, weights, new_chunk_states)
+    print(f"[signals] generated_chunks={generated}")
+
+    if layout == "chunk":
+        clear_partitions(signal_dir, "signals")
+    else:
+        # Partitions always cover the full history, delta parts included.
+        with phase("read") as timer:
+            history = concat_columns(
+                read_columns(path) for path in sorted(signal_dir.glob("signals_chunk_*.parquet"))
+            )
+            timer.rows = num_rows(history)
+        with phase("write") as timer:
+            index_file = write_partitions(signal_dir, "signals", history, layout)
+            timer.rows = num_rows(history)
+        print(f"[signals] partitions layout={layout} index={index_file}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
     cfg = load_config("config.yaml")
     prepared_dir = Path(cfg["data"]["prepared_dir"])
     signal_dir = ensure_dir(prepared_dir / "signals")
@@ -64,6 +333,8 @@ def main() -> None:
     weights = [float(x) for x in cfg["strategy"]["weights"]]
     if len(mom_windows) != len(weights):
         raise ValueError("mom_windows and weights length mismatch")
+    if any(window <= 0 for window in mom_windows):
+        raise ValueError("mom_windows must be positive")
 
     prepared_files = sorted(prepared_dir.glob("prepared_chunk_*.parquet"))
     if not prepared_files:
@@ -71,23 +342,21 @@ def main() -> None:
             "No prepared chunks found. Please run prepare_data.py first."
         )
 
-    print(
-        "[signals] windows=%s weights=%s chunks=%d"
-        % (mom_windows, weights, len(prepared_files))
-    )
-    generated = 0
-    for prepared_file in prepared_files:
-        rows = read_table(prepared_file)
-        out_rows = compute_scores(rows, mom_windows=mom_windows, weights=weights)
-
-        out_file = signal_dir / prepared_file.name.replace("prepared_chunk", "signals_chunk")
-        write_table(out_file, out_rows)
-        generated += 1
-        print(f"[signals] {prepared_file.name} rows={len(out_rows)} -> {out_file.name}")
-
-    print(f"[signals] done. generated_chunks={generated}")
+    layout = partition_layout(cfg)
+    with stage_stats(cfg, "signals") as stats:
+        stats.cached = run_cached_stage(
+            cfg,
+            "signals",
+            SIGNALS_CONFIG_KEYS,
+            prepared_files,
+            signal_dir,
+            ["signals_chunk_*.parquet", STATE_NAME, "signals_part_*.parquet", "signals_index.json"],
+            lambda: score_all(
+                signal_dir, prepared_files, mom_windows, weights, args.incremental, layout
+            ),
+        )
+    print("[signals] done")
 
 
 if __name__ == "__main__":
     main()
-
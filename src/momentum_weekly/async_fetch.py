@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from .data_provider import BaseDataProvider, TransientFetchError
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+class AsyncFetcher:
+    def __init__(
+        self,
+        provider: BaseDataProvider,
+        concurrency: int = 8,
+        rate: float = 0.0,
+        burst: float = 1.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+    ):
+        self.provider = provider
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._bucket = TokenBucket(rate, burst)
+        self.requests = 0
+        self.retried = 0
+
+    async def fetch(self, symbols: list[str], start_date: str, end_date: str) -> dict[str, list]:
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                await self._bucket.acquire()
+                self.requests += 1
+                try:
+                    return await self.provider.get_price_data_async(
+                        symbols, start_date, end_date, columnar=True
+                    )
+                except TransientFetchError:
+                    if attempt >= self.retries:
+                        raise
+            # Back off outside the semaphore so other requests keep the slot busy.
+            self.retried += 1
+            await asyncio.sleep(min(self.max_backoff, self.backoff * 2**attempt))
+            attempt += 1
+
+    async def fetch_all(self, requests: list[tuple[list[str], str, str]]) -> list[dict[str, list]]:
+        return list(await asyncio.gather(*(self.fetch(*request) for request in requests)))
+
+
+def create_fetcher(
+    provider: BaseDataProvider, cfg: dict, concurrency: int | None = None
+) -> AsyncFetcher:
+    data_cfg = cfg["data"]
+    return AsyncFetcher(
+        provider,
+        concurrency=concurrency or int(data_cfg.get("fetch_concurrency", 8)),
+        rate=float(data_cfg.get("fetch_rate_limit", 0) or 0),
+        burst=float(data_cfg.get("fetch_rate_burst", 1) or 1),
+        retries=int(data_cfg.get("fetch_retries", 3)),
+        backoff=float(data_cfg.get("fetch_retry_backoff_sec", 0.5)),
+    )
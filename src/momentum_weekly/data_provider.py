@@ -1,9 +1,30 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import http.client
+import json
+import math
+import os
+import queue
+import time
 from abc import ABC, abstractmethod
+from bisect import bisect_left
 from datetime import date
 from datetime import datetime
 from datetime import timedelta
+from itertools import accumulate
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from .io_utils import (
+    Columns,
+    columns_to_rows,
+    concat_columns,
+    read_columns,
+    take_columns,
+    write_columns,
+)
 
 
 def _business_days(start_date: str, end_date: str) -> list[date]:
@@ -22,12 +43,22 @@ def _uniform_from_seed(seed: int) -> float:
     return ((seed % 10_000_019) + 1) / 10_000_020.0
 
 
-def _box_muller(seed_a: int, seed_b: int) -> float:
-    import math
+def _uniform_series(seed: int, step: int, count: int) -> list[float]:
+    return [
+        ((value % 10_000_019) + 1) / 10_000_020.0
+        for value in range(seed, seed + step * count, step)
+    ]
+
 
-    u1 = max(_uniform_from_seed(seed_a), 1e-9)
-    u2 = _uniform_from_seed(seed_b)
-    return math.sqrt(-2.0 * math.log(u1)) * math.cos(2.0 * math.pi * u2)
+def _box_muller_series(
+    seed_a: int, step_a: int, seed_b: int, step_b: int, count: int
+) -> list[float]:
+    # Uniforms are bounded below by 1 / 10_000_020, so the 1e-9 clamp never applies here.
+    logs = map(math.log, _uniform_series(seed_a, step_a, count))
+    radii = map(math.sqrt, [-2.0 * value for value in logs])
+    two_pi = 2.0 * math.pi
+    angles = map(math.cos, [two_pi * value for value in _uniform_series(seed_b, step_b, count)])
+    return [radius * angle for radius, angle in zip(radii, angles)]
 
 
 def _seed_for(*parts: object) -> int:
@@ -38,6 +69,10 @@ def _seed_for(*parts: object) -> int:
     return total
 
 
+class TransientFetchError(RuntimeError):
+    """Retryable provider failure (timeouts, dropped connections, 429/5xx responses)."""
+
+
 class BaseDataProvider(ABC):
     @abstractmethod
     def get_universe(self, num_stocks: int) -> list[str]:
@@ -49,13 +84,30 @@ class BaseDataProvider(ABC):
         symbols: list[str],
         start_date: str,
         end_date: str,
-    ) -> list[dict]:
+        columnar: bool = False,
+    ) -> list[dict] | dict[str, list]:
         raise NotImplementedError
 
+    async def get_price_data_async(
+        self,
+        symbols: list[str],
+        start_date: str,
+        end_date: str,
+        columnar: bool = False,
+    ) -> list[dict] | dict[str, list]:
+        # Blocking providers run in a worker thread; I/O-bound providers override this.
+        return await asyncio.to_thread(self.get_price_data, symbols, start_date, end_date, columnar)
+
+    def close(self) -> None:
+        return None
+
 
 class MockDataProvider(BaseDataProvider):
-    def __init__(self, seed: int = 42):
+    def __init__(self, seed: int = 42, origin_date: str | None = None):
         self.seed = seed
+        # Paths are always simulated from origin_date, so a tail request for a later
+        # window returns the same bars as the matching slice of a full-history request.
+        self.origin_date = origin_date
 
     def get_universe(self, num_stocks: int) -> list[str]:
         symbols: list[str] = []
@@ -70,41 +122,163 @@ class MockDataProvider(BaseDataProvider):
         symbols: list[str],
         start_date: str,
         end_date: str,
-    ) -> list[dict]:
-        import math
-
-        days = _business_days(start_date, end_date)
-        rows: list[dict] = []
-
-        for symbol in symbols:
+        columnar: bool = False,
+    ) -> list[dict] | dict[str, list]:
+        first_day = start_date if self.origin_date is None else min(self.origin_date, start_date)
+        calendar = [day.isoformat() for day in _business_days(first_day, end_date)]
+        offset = bisect_left(calendar, start_date)
+        days = calendar[offset:]
+        num_days = len(calendar)
+        columns: dict[str, list] = {
+            "date": [],
+            "symbol": [],
+            "open": [],
+            "close": [],
+            "in_universe": [],
+        }
+
+        for symbol in sorted(symbols):
             base_seed = _seed_for(self.seed, symbol)
             drift = 0.00015 + 0.00025 * _uniform_from_seed(base_seed + 17)
             vol = 0.010 + 0.020 * _uniform_from_seed(base_seed + 31)
+            first_close = 40.0 + 20.0 * _uniform_from_seed(base_seed + 59)
+
+            noise = _box_muller_series(base_seed + 101, 7, base_seed + 203, 11, num_days)
+            gap_noise = _box_muller_series(base_seed + 307, 13, base_seed + 401, 17, num_days)
 
-            close_price = 40.0 + 20.0 * _uniform_from_seed(base_seed + 59)
-            prev_close = close_price
-
-            for idx, day in enumerate(days):
-                noise = _box_muller(base_seed + idx * 7 + 101, base_seed + idx * 11 + 203)
-                log_ret = drift + vol * noise * 0.6
-                close_price = max(0.5, prev_close * math.exp(log_ret))
-
-                gap_noise = _box_muller(base_seed + idx * 13 + 307, base_seed + idx * 17 + 401)
-                open_price = max(0.5, prev_close * math.exp(0.25 * vol * gap_noise))
-
-                rows.append(
-                    {
-                        "date": day.isoformat(),
-                        "symbol": symbol,
-                        "open": round(open_price, 6),
-                        "close": round(close_price, 6),
-                        "in_universe": 1,
-                    }
+            log_rets = [drift + vol * value * 0.6 for value in noise]
+            path = list(
+                accumulate(
+                    log_rets,
+                    lambda prev, log_ret: max(0.5, prev * math.exp(log_ret)),
+                    initial=first_close,
                 )
-                prev_close = close_price
+            )
+            prev_closes = path[:-1]
+            opens = [
+                max(0.5, prev * math.exp(0.25 * vol * gap))
+                for prev, gap in zip(prev_closes, gap_noise)
+            ]
 
-        rows.sort(key=lambda item: (item["symbol"], item["date"]))
-        return rows
+            columns["date"].extend(days)
+            columns["symbol"].extend([symbol] * len(days))
+            columns["open"].extend([round(value, 6) for value in opens[offset:]])
+            columns["close"].extend([round(value, 6) for value in path[offset + 1 :]])
+            columns["in_universe"].extend([1] * len(days))
+
+        if columnar:
+            return columns
+        return columns_to_rows(columns)
+
+
+class LatencyMockProvider(MockDataProvider):
+    """Mock provider that behaves like a remote API: every request waits ``latency`` seconds,
+    and every ``fail_every``-th request fails once with a retryable error."""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        origin_date: str | None = None,
+        latency: float = 0.05,
+        fail_every: int = 0,
+    ):
+        super().__init__(seed=seed, origin_date=origin_date)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+
+    async def get_price_data_async(
+        self,
+        symbols: list[str],
+        start_date: str,
+        end_date: str,
+        columnar: bool = False,
+    ) -> list[dict] | dict[str, list]:
+        self.calls += 1
+        # Number taken before the await: concurrent requests keep bumping the counter.
+        call = self.calls
+        await asyncio.sleep(self.latency)
+        if self.fail_every > 0 and call % self.fail_every == 0:
+            raise TransientFetchError(f"injected failure on request {call}")
+        return self.get_price_data(symbols, start_date, end_date, columnar)
+
+
+class HttpJsonProvider(BaseDataProvider):
+    """Provider for a JSON-over-HTTP price service.
+
+    ``GET /universe?num_stocks=N`` returns ``{"symbols": [...]}`` and
+    ``GET /prices?symbols=A,B&start=...&end=...`` returns columnar
+    ``{"date": [...], "symbol": [...], "open": [...], "close": [...], "in_universe": [...]}``.
+    Keep-alive connections are pooled and reused across requests.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10.0, pool_size: int = 8):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid http_base_url: {base_url!r}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=max(1, pool_size))
+
+    def _connect(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            if self.scheme == "https":
+                return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _get_json(self, path: str, params: dict[str, str]) -> dict:
+        conn = self._connect()
+        try:
+            conn.request("GET", f"{self.base_path}{path}?{urlencode(params)}")
+            response = conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            conn.close()
+            raise TransientFetchError(f"{path} request failed: {exc}") from exc
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        if response.status == 429 or response.status >= 500:
+            raise TransientFetchError(f"{path} returned HTTP {response.status}")
+        if response.status != 200:
+            raise RuntimeError(f"{path} returned HTTP {response.status}: {body[:200]!r}")
+        return json.loads(body)
+
+    def get_universe(self, num_stocks: int) -> list[str]:
+        payload = self._get_json("/universe", {"num_stocks": str(num_stocks)})
+        return [str(symbol) for symbol in payload["symbols"]]
+
+    def get_price_data(
+        self,
+        symbols: list[str],
+        start_date: str,
+        end_date: str,
+        columnar: bool = False,
+    ) -> list[dict] | dict[str, list]:
+        columns = self._get_json(
+            "/prices", {"symbols": ",".join(symbols), "start": start_date, "end": end_date}
+        )
+        return columns if columnar else columns_to_rows(columns)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
 
 
 class TuShareProvider(BaseDataProvider):
@@ -116,7 +290,8 @@ class TuShareProvider(BaseDataProvider):
         symbols: list[str],
         start_date: str,
         end_date: str,
-    ) -> list[dict]:
+        columnar: bool = False,
+    ) -> list[dict] | dict[str, list]:
         raise NotImplementedError("TuShare provider will be implemented later.")
 
 
@@ -129,18 +304,211 @@ class JoinQuantProvider(BaseDataProvider):
         symbols: list[str],
         start_date: str,
         end_date: str,
-    ) -> list[dict]:
+        columnar: bool = False,
+    ) -> list[dict] | dict[str, list]:
         raise NotImplementedError("JoinQuant provider will be implemented later.")
 
 
-def create_provider(config: dict) -> BaseDataProvider:
-    provider_name = str(config["data"]["provider"]).lower()
+class CachingProvider(BaseDataProvider):
+    """Per-(symbol, date range) on-disk cache in front of another provider.
+
+    Entries whose window ends before ``today - recent_days`` are treated as immutable; more
+    recent ones expire after ``ttl_seconds``. Total size is capped with LRU eviction (entry
+    mtime is refreshed on every hit); the directory is only rescanned when the running size
+    total of this process says the cap is exceeded.
+    """
+
+    def __init__(
+        self,
+        inner: BaseDataProvider,
+        cache_dir: str | Path,
+        namespace: str,
+        max_bytes: int,
+        recent_days: int = 7,
+        ttl_seconds: float = 12 * 3600,
+    ):
+        self.inner = inner
+        self.cache_dir = Path(cache_dir)
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.recent_days = recent_days
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._size: int | None = None
+
+    def _paths(self, symbol: str, start_date: str, end_date: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(
+            f"{self.namespace}|{symbol}|{start_date}|{end_date}".encode("utf-8")
+        ).hexdigest()[:32]
+        return self.cache_dir / f"{key}.parquet", self.cache_dir / f"{key}.json"
+
+    def _lookup(
+        self, symbols: list[str], start_date: str, end_date: str
+    ) -> tuple[dict[str, Columns], list[str]]:
+        cached: dict[str, Columns] = {}
+        missing: list[str] = []
+        now = time.time()
+        for symbol in symbols:
+            data_path, meta_path = self._paths(symbol, start_date, end_date)
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                expires_at = meta.get("expires_at")
+                if expires_at is not None and now >= float(expires_at):
+                    self.stats["expired"] += 1
+                    data_path.unlink(missing_ok=True)
+                    meta_path.unlink(missing_ok=True)
+                    raise FileNotFoundError(data_path)
+                cached[symbol] = read_columns(data_path)
+                os.utime(data_path)
+                self.stats["hits"] += 1
+            except (FileNotFoundError, ValueError):
+                self.stats["misses"] += 1
+                missing.append(symbol)
+        return cached, missing
+
+    def _store(
+        self, columns: Columns, symbols: list[str], start_date: str, end_date: str
+    ) -> dict[str, Columns]:
+        if "symbol" not in columns:
+            return {}
+        positions: dict[str, list[int]] = {symbol: [] for symbol in symbols}
+        for idx, symbol in enumerate(columns["symbol"]):
+            positions.setdefault(str(symbol), []).append(idx)
+
+        cutoff = (date.today() - timedelta(days=self.recent_days)).isoformat()
+        expires_at = None if end_date < cutoff else time.time() + self.ttl_seconds
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fetched: dict[str, Columns] = {}
+        added = 0
+        for symbol in symbols:
+            symbol_columns = take_columns(columns, positions[symbol])
+            data_path, meta_path = self._paths(symbol, start_date, end_date)
+            if data_path.exists():
+                added -= data_path.stat().st_size
+            write_columns(data_path, symbol_columns)
+            added += data_path.stat().st_size
+            meta = {
+                "symbol": symbol,
+                "start": start_date,
+                "end": end_date,
+                "expires_at": expires_at,
+            }
+            meta_path.write_text(json.dumps(meta), encoding="utf-8")
+            fetched[symbol] = symbol_columns
+        if self._size is None or self._size + added > self.max_bytes:
+            self.evict()
+        else:
+            self._size += added
+        return fetched
+
+    def evict(self) -> None:
+        entries: list[tuple[float, int, Path]] = []
+        for data_path in self.cache_dir.glob("*.parquet"):
+            try:
+                stat = data_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, data_path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, data_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            data_path.unlink(missing_ok=True)
+            data_path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+            self.stats["evicted"] += 1
+        self._size = total
+
+    def _combine(self, parts: dict[str, Columns], symbols: list[str], columnar: bool):
+        # Same symbol order as the providers themselves (sorted), whatever was cached.
+        columns = concat_columns(parts[symbol] for symbol in sorted(symbols))
+        return columns if columnar else columns_to_rows(columns)
+
+    def get_universe(self, num_stocks: int) -> list[str]:
+        return self.inner.get_universe(num_stocks)
+
+    def get_price_data(
+        self,
+        symbols: list[str],
+        start_date: str,
+        end_date: str,
+        columnar: bool = False,
+    ) -> list[dict] | dict[str, list]:
+        parts, missing = self._lookup(symbols, start_date, end_date)
+        if missing:
+            fresh = self.inner.get_price_data(missing, start_date, end_date, columnar=True)
+            parts.update(self._store(fresh, missing, start_date, end_date))
+        return self._combine(parts, symbols, columnar)
+
+    async def get_price_data_async(
+        self,
+        symbols: list[str],
+        start_date: str,
+        end_date: str,
+        columnar: bool = False,
+    ) -> list[dict] | dict[str, list]:
+        parts, missing = self._lookup(symbols, start_date, end_date)
+        if missing:
+            fresh = await self.inner.get_price_data_async(
+                missing, start_date, end_date, columnar=True
+            )
+            parts.update(self._store(fresh, missing, start_date, end_date))
+        return self._combine(parts, symbols, columnar)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def _create_base_provider(config: dict) -> BaseDataProvider:
+    data_cfg = config["data"]
+    provider_name = str(data_cfg["provider"]).lower()
     seed = int(config["project"]["seed"])
 
     if provider_name == "mock":
-        return MockDataProvider(seed=seed)
+        latency_ms = float(data_cfg.get("mock_latency_ms", 0) or 0)
+        if latency_ms > 0:
+            return LatencyMockProvider(
+                seed=seed,
+                origin_date=str(data_cfg["start_date"]),
+                latency=latency_ms / 1000.0,
+                fail_every=int(data_cfg.get("mock_fail_every", 0) or 0),
+            )
+        return MockDataProvider(seed=seed, origin_date=str(data_cfg["start_date"]))
+    if provider_name == "http":
+        return HttpJsonProvider(
+            base_url=str(data_cfg.get("http_base_url", "")),
+            timeout=float(data_cfg.get("http_timeout_sec", 10.0)),
+            pool_size=int(data_cfg.get("fetch_concurrency", 8)),
+        )
     if provider_name == "tushare":
         return TuShareProvider()
     if provider_name == "joinquant":
         return JoinQuantProvider()
     raise ValueError(f"Unsupported provider: {provider_name}")
+
+
+def create_provider(config: dict) -> BaseDataProvider:
+    provider = _create_base_provider(config)
+    cache_cfg = config.get("provider_cache", {}) or {}
+    if not cache_cfg.get("enabled", False):
+        return provider
+
+    data_cfg = config["data"]
+    namespace = "|".join(
+        [
+            str(data_cfg["provider"]).lower(),
+            str(config["project"]["seed"]),
+            # The mock series are generated from data.start_date onwards.
+            str(data_cfg["start_date"]),
+            str(data_cfg.get("http_base_url", "")),
+        ]
+    )
+    return CachingProvider(
+        provider,
+        cache_dir=cache_cfg.get("dir", ".cache/provider"),
+        namespace=namespace,
+        max_bytes=int(float(cache_cfg.get("max_mb", 1024)) * 1024 * 1024),
+        recent_days=int(cache_cfg.get("recent_days", 7)),
+        ttl_seconds=float(cache_cfg.get("ttl_hours", 12)) * 3600,
+    )
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+from array import array
+from bisect import bisect_right
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from .io_utils import Columns, MappedTable, open_mapped, read_columns
+
+DICTIONARIES_NAME = "dictionaries.json"
+
+
+class SymbolTable:
+    """Interned symbols: IDs follow sorted symbol order, so comparing IDs compares symbols."""
+
+    def __init__(self, symbols: Iterable[str]):
+        self.symbols = sorted({str(symbol) for symbol in symbols})
+        self.ids = {symbol: sid for sid, symbol in enumerate(self.symbols)}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def encode(self, values: Sequence[str]) -> array:
+        ids = self.ids
+        return array("i", [ids[value] for value in values])
+
+
+class TradingCalendar:
+    """Trading days as ISO strings <-> day index; ``dates`` are parsed once."""
+
+    def __init__(self, days: Iterable[str]):
+        self.days = sorted({str(day) for day in days})
+        self.index = {day: pos for pos, day in enumerate(self.days)}
+        self.dates = [date.fromisoformat(day) for day in self.days]
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def encode(self, values: Sequence[str]) -> array:
+        index = self.index
+        return array("i", [index[value] for value in values])
+
+    def last_on_or_before(self, day: str) -> int:
+        return bisect_right(self.days, day) - 1
+
+
+def build_dictionaries(tables: Iterable[Columns]) -> tuple[SymbolTable, TradingCalendar]:
+    symbols: set[str] = set()
+    days: set[str] = set()
+    for table in tables:
+        symbols.update(table["symbol"])
+        days.update(table["date"])
+    return SymbolTable(symbols), TradingCalendar(days)
+
+
+def save_dictionaries(directory: Path, symbols: SymbolTable, calendar: TradingCalendar) -> Path:
+    path = directory / DICTIONARIES_NAME
+    path.write_text(
+        json.dumps({"symbols": symbols.symbols, "calendar": calendar.days}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    return path
+
+
+def load_dictionaries(directory: Path) -> tuple[SymbolTable, TradingCalendar] | None:
+    path = directory / DICTIONARIES_NAME
+    if not path.exists():
+        return None
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return SymbolTable(payload["symbols"]), TradingCalendar(payload["calendar"])
+
+
+def _remap(table: MappedTable, name: str, lookup: dict[str, int]) -> array | None:
+    codes = table.codes(name)
+    if codes is None:
+        return None
+    local_codes, dictionary = codes
+    # One hash lookup per distinct value in the file, then a pure integer remap per row.
+    remap = [lookup[value] for value in dictionary]
+    return array("i", [remap[code] for code in local_codes])
+
+
+def read_keys(
+    path: Path, symbols: SymbolTable, calendar: TradingCalendar
+) -> tuple[array, array]:
+    table = open_mapped(path)
+    if table is not None:
+        with table:
+            symbol_ids = _remap(table, "symbol", symbols.ids)
+            day_ids = _remap(table, "date", calendar.index)
+        if symbol_ids is not None and day_ids is not None:
+            return symbol_ids, day_ids
+    columns = read_columns(path, columns=["symbol", "date"])
+    return symbols.encode(columns["symbol"]), calendar.encode(columns["date"])
+
+
+def load_keys(
+    dictionary_dir: Path, files: list[Path]
+) -> tuple[tuple[SymbolTable, TradingCalendar], list[tuple[array, array]]]:
+    """Global keys of every file, using the dictionaries saved in ``dictionary_dir`` and
+    rebuilding them from the files when they are missing or do not cover every key."""
+    dictionaries = load_dictionaries(dictionary_dir)
+    if dictionaries is not None:
+        try:
+            return dictionaries, [read_keys(path, *dictionaries) for path in files]
+        except KeyError:
+            pass
+    dictionaries = build_dictionaries(
+        read_columns(path, columns=["symbol", "date"]) for path in files
+    )
+    return dictionaries, [read_keys(path, *dictionaries) for path in files]
+
+
+def concat_keys(file_keys: Iterable[tuple[array, array]]) -> tuple[array, array]:
+    symbol_ids, day_ids = array("i"), array("i")
+    for file_symbol_ids, file_day_ids in file_keys:
+        symbol_ids.extend(file_symbol_ids)
+        day_ids.extend(file_day_ids)
+    return symbol_ids, day_ids
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, TypeVar
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+DEFAULT_STATS_PATH = "outputs/metrics/run_stats.json"
+
+
+class Phase:
+    __slots__ = ("rows",)
+
+    def __init__(self) -> None:
+        self.rows = 0
+
+
+class StageStats:
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.cached = False
+        self.phases: dict[str, dict[str, float]] = {}
+        # [start time, time spent in nested phases] per open phase.
+        self._stack: list[list[float]] = []
+
+    def _enter(self) -> None:
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def _exit(self, name: str, rows: int) -> None:
+        started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        if self._stack:
+            self._stack[-1][1] += elapsed
+        entry = self.phases.setdefault(name, {"seconds": 0.0, "rows": 0, "calls": 0})
+        # Exclusive time, so a read phase inside a compute phase is not counted twice.
+        entry["seconds"] += elapsed - nested
+        entry["rows"] += rows
+        entry["calls"] += 1
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {
+            name: {
+                **entry,
+                "rows_per_sec": entry["rows"] / entry["seconds"] if entry["seconds"] > 0 else 0.0,
+            }
+            for name, entry in self.phases.items()
+        }
+
+
+_active: StageStats | None = None
+
+
+@contextmanager
+def phase(name: str) -> Iterator[Phase]:
+    """Time a read/compute/write block of the running stage; set ``.rows`` for throughput."""
+    current = Phase()
+    stats = _active
+    if stats is None:
+        yield current
+        return
+    stats._enter()
+    try:
+        yield current
+    finally:
+        stats._exit(name, current.rows)
+
+
+def timed_iter(
+    name: str, items: Iterable[T], count: Callable[[T], int] = lambda item: 1
+) -> Iterator[T]:
+    """Charge the time spent producing each item (e.g. streaming reads) to ``name``."""
+    iterator = iter(items)
+    while True:
+        with phase(name) as current:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            current.rows = count(item)
+        yield item
+
+
+def _peak_rss_mb() -> dict[str, float]:
+    if resource is None:
+        return {}
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    peaks = {"peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale}
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    if children:
+        peaks["children_peak_rss_mb"] = children
+    return peaks
+
+
+def _tracemalloc_stats(limit: int = 10) -> dict:
+    _, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+    return {
+        "tracemalloc_peak_mb": peak / (1024 * 1024),
+        "tracemalloc_retained_top": [
+            {
+                "where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_mb": stat.size / (1024 * 1024),
+                "count": stat.count,
+            }
+            for stat in top
+        ],
+    }
+
+
+def _profiled(instr_cfg: dict, stage: str) -> bool:
+    profile = instr_cfg.get("profile", False)
+    if isinstance(profile, (list, tuple)):
+        return stage in profile
+    return bool(profile)
+
+
+def save_run_stats(path: Path, stage: str, entry: dict) -> Path:
+    """Merge ``entry`` into the stats file, keeping the latest run of every stage."""
+    payload: dict = {}
+    if path.exists():
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            payload = {}
+    payload.setdefault("stages", {})[stage] = entry
+    payload["updated_at"] = entry["finished_at"]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return path
+
+
+@contextmanager
+def stage_stats(cfg: dict, stage: str) -> Iterator[StageStats]:
+    """Collect phase timings, peak memory and an optional cProfile dump for one stage run
+    and record them under ``stages.<stage>`` in ``instrumentation.stats_path``."""
+    global _active
+    instr_cfg = cfg.get("instrumentation", {}) or {}
+    stats = StageStats(stage)
+    if not instr_cfg.get("enabled", True):
+        yield stats
+        return
+
+    trace = bool(instr_cfg.get("tracemalloc", False)) and not tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if _profiled(instr_cfg, stage) else None
+
+    previous, _active = _active, stats
+    status = "error"
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield stats
+        status = "ok"
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        seconds = time.perf_counter() - started
+        _active = previous
+
+        entry = {
+            "started_at": stats.started_at,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "status": status,
+            "cached": stats.cached,
+            "seconds": seconds,
+            "phases": stats.summary(),
+            **_peak_rss_mb(),
+        }
+        if trace:
+            entry.update(_tracemalloc_stats())
+            tracemalloc.stop()
+        if profiler is not None:
+            profile_dir = Path(instr_cfg.get("profile_dir", "outputs/metrics/profiles"))
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            profile_path = profile_dir / f"{stage}.prof"
+            profiler.dump_stats(str(profile_path))
+            entry["profile"] = str(profile_path)
+
+        stats_path = save_run_stats(
+            Path(instr_cfg.get("stats_path", DEFAULT_STATS_PATH)), stage, entry
+        )
+        phases = " ".join(
+            f"{name}={item['seconds']:.2f}s" for name, item in entry["phases"].items()
+        )
+        print(
+            f"[{stage}] stats seconds={seconds:.2f} {phases} "
+            f"peak_rss_mb={entry.get('peak_rss_mb', 0.0):.0f} -> {stats_path}"
+        )
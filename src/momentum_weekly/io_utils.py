@@ -1,8 +1,36 @@
 from __future__ import annotations
 
 import json
+import mmap
+import operator
+import os
+import struct
+import sys
+from array import array
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Sequence
+
+Columns = dict[str, Sequence[Any]]
+# pyarrow-style predicates: [(column, op, value), ...] (AND) or a list of such lists (OR).
+Filters = list[tuple[str, str, Any]] | list[list[tuple[str, str, Any]]]
+
+BINARY_MAGIC = b"MWCOL1\x00\x00"
+_HEADER_LEN = struct.Struct("<I")
+METADATA_KEY = b"momentum_weekly"
+_INT32_MIN = -(2**31)
+_INT32_MAX = 2**31 - 1
+
+_FILTER_OPS: dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, options: value in options,
+    "not in": lambda value, options: value not in options,
+}
 
 
 def _can_use_parquet() -> bool:
@@ -15,19 +43,442 @@ def _can_use_parquet() -> bool:
         return False
 
 
+def _normalize_value(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
 def _normalize_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
     normalized: list[dict[str, Any]] = []
     for row in rows:
         clean: dict[str, Any] = {}
         for key, value in row.items():
-            if hasattr(value, "isoformat"):
-                clean[key] = value.isoformat()
-            else:
-                clean[key] = value
+            clean[key] = _normalize_value(value)
         normalized.append(clean)
     return normalized
 
 
+def _typed_column(values: Iterable[Any]) -> Sequence[Any]:
+    items = values if isinstance(values, list) else list(values)
+    if not items:
+        return items
+    if all(type(item) is int for item in items):
+        return array("q", items)
+    if all(type(item) in (int, float) for item in items):
+        return array("d", items)
+    return [_normalize_value(item) for item in items]
+
+
+def _decode_column(payload: Any) -> Sequence[Any]:
+    if isinstance(payload, dict):
+        values = payload.get("values", [])
+        return [values[code] for code in payload.get("codes", [])]
+    return _typed_column(payload)
+
+
+def _columns_from_payload(path_obj: Path, payload: dict[str, Any]) -> Columns:
+    encoded = payload.get("columns", {})
+    if not isinstance(encoded, dict):
+        raise ValueError(f"Invalid table columns in {path_obj}")
+    return {key: _decode_column(values) for key, values in encoded.items()}
+
+
+def _filter_groups(filters: Filters | None) -> list[list[tuple[str, str, Any]]]:
+    if not filters:
+        return []
+    groups = [list(filters)] if isinstance(filters[0], tuple) else [list(g) for g in filters]
+    normalized: list[list[tuple[str, str, Any]]] = []
+    for group in groups:
+        terms: list[tuple[str, str, Any]] = []
+        for name, op, value in group:
+            if op not in _FILTER_OPS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if op in ("in", "not in"):
+                value = {_normalize_value(item) for item in value}
+            else:
+                value = _normalize_value(value)
+            terms.append((name, op, value))
+        normalized.append(terms)
+    return normalized
+
+
+def _matching_rows(
+    evaluate: Callable[[str, Callable[[Any], bool]], Sequence[bool]],
+    total: int,
+    filters: Filters | None,
+) -> list[int] | None:
+    groups = _filter_groups(filters)
+    if not groups:
+        return None
+    keep = [False] * total
+    for group in groups:
+        mask = [True] * total
+        for name, op, value in group:
+            compare = _FILTER_OPS[op]
+            hits = evaluate(name, lambda item, compare=compare, value=value: compare(item, value))
+            mask = [left and right for left, right in zip(mask, hits)]
+        keep = [left or right for left, right in zip(keep, mask)]
+    return [idx for idx, flag in enumerate(keep) if flag]
+
+
+def _select(columns: Columns, names: Iterable[str] | None, filters: Filters | None) -> Columns:
+    indices = _matching_rows(
+        lambda name, predicate: [predicate(item) for item in columns[name]],
+        num_rows(columns),
+        filters,
+    )
+    projected = columns if names is None else {name: columns[name] for name in names}
+    return projected if indices is None else take_columns(projected, indices)
+
+
+def _binary_section(values: Sequence[Any]) -> tuple[dict[str, Any], bytes]:
+    if isinstance(values, array) and values.typecode == "d":
+        return {"kind": "f8"}, values.tobytes()
+    items = values.tolist() if isinstance(values, array) else [_normalize_value(v) for v in values]
+    if items and all(type(item) is int for item in items):
+        if all(_INT32_MIN <= item <= _INT32_MAX for item in items):
+            return {"kind": "i4"}, array("i", items).tobytes()
+        return {"kind": "i8"}, array("q", items).tobytes()
+    if items and all(type(item) in (int, float) for item in items):
+        return {"kind": "f8"}, array("d", items).tobytes()
+    if items and all(isinstance(item, str) for item in items):
+        lookup: dict[str, int] = {}
+        codes = array("i", [lookup.setdefault(item, len(lookup)) for item in items])
+        return {"kind": "dict", "dictionary": list(lookup)}, codes.tobytes()
+    return {"kind": "json"}, json.dumps(items, ensure_ascii=False).encode("utf-8")
+
+
+def _write_binary(path_obj: Path, columns: Columns, metadata: dict[str, Any] | None) -> None:
+    specs: list[dict[str, Any]] = []
+    sections: list[bytes] = []
+    offset = 0
+    for key, values in columns.items():
+        spec, data = _binary_section(values)
+        spec.update({"name": key, "offset": offset, "length": len(data)})
+        specs.append(spec)
+        sections.append(data)
+        padded = -len(data) % 8
+        sections.append(b"\x00" * padded)
+        offset += len(data) + padded
+
+    header = json.dumps(
+        {
+            "num_rows": num_rows(columns),
+            "byteorder": sys.byteorder,
+            "metadata": metadata or {},
+            "columns": specs,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    header += b" " * (-(len(BINARY_MAGIC) + _HEADER_LEN.size + len(header)) % 8)
+
+    # Write through a temp file so readers holding a mapping of the old file are not truncated.
+    tmp_path = path_obj.with_name(f".{path_obj.name}.tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(BINARY_MAGIC)
+        handle.write(_HEADER_LEN.pack(len(header)))
+        handle.write(header)
+        for data in sections:
+            handle.write(data)
+    os.replace(tmp_path, path_obj)
+
+
+def _is_binary(path_obj: Path) -> bool:
+    with path_obj.open("rb") as handle:
+        return handle.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+class MappedTable:
+    """Read-only view of a binary columnar file backed by ``mmap``.
+
+    Numeric columns come back as ``memoryview`` slices of the mapping (no copy); string
+    columns decode only the requested rows through their dictionary.
+    """
+
+    def __init__(self, path: str | Path):
+        path_obj = Path(path)
+        with path_obj.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(BINARY_MAGIC)] != BINARY_MAGIC:
+            raise ValueError(f"Not a binary columnar file: {path_obj}")
+        (header_len,) = _HEADER_LEN.unpack_from(self._map, len(BINARY_MAGIC))
+        header_start = len(BINARY_MAGIC) + _HEADER_LEN.size
+        header = json.loads(bytes(self._map[header_start : header_start + header_len]))
+        self.path = path_obj
+        self.num_rows = int(header["num_rows"])
+        self._swap = header.get("byteorder", sys.byteorder) != sys.byteorder
+        self._data_start = header_start + header_len
+        self._specs = {str(spec["name"]): spec for spec in header["columns"]}
+        self.metadata: dict[str, Any] = header.get("metadata", {})
+        self.names = list(self._specs)
+
+    def close(self) -> None:
+        """Unmap the file. Zero-copy views handed out earlier keep the mapping alive; it is
+        then released together with the last of them."""
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> MappedTable:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _raw(self, spec: dict[str, Any], typecode: str) -> memoryview:
+        start = self._data_start + int(spec["offset"])
+        view = memoryview(self._map)[start : start + int(spec["length"])].cast(typecode)
+        if not self._swap:
+            return view
+        swapped = array(typecode, view.tobytes())
+        swapped.byteswap()
+        return memoryview(swapped)
+
+    def column(self, name: str, start: int = 0, stop: int | None = None) -> Sequence[Any]:
+        spec = self._specs[name]
+        kind = spec["kind"]
+        if kind == "f8":
+            return self._raw(spec, "d")[start:stop]
+        if kind == "i4":
+            return self._raw(spec, "i")[start:stop]
+        if kind == "i8":
+            return self._raw(spec, "q")[start:stop]
+        if kind == "dict":
+            dictionary = spec["dictionary"]
+            return [dictionary[code] for code in self._raw(spec, "i")[start:stop]]
+        begin = self._data_start + int(spec["offset"])
+        return json.loads(bytes(self._map[begin : begin + int(spec["length"])]))[start:stop]
+
+    def codes(self, name: str) -> tuple[memoryview, list[str]] | None:
+        spec = self._specs[name]
+        if spec["kind"] != "dict":
+            return None
+        return self._raw(spec, "i"), spec["dictionary"]
+
+    def evaluate(self, name: str, predicate: Callable[[Any], bool]) -> Sequence[bool]:
+        spec = self._specs[name]
+        if spec["kind"] == "dict":
+            # One predicate call per distinct value, then a scan over the int32 codes.
+            allowed = [predicate(value) for value in spec["dictionary"]]
+            return [allowed[code] for code in self._raw(spec, "i")]
+        return [predicate(value) for value in self.column(name)]
+
+    def read(
+        self,
+        names: Iterable[str] | None = None,
+        start: int = 0,
+        stop: int | None = None,
+        filters: Filters | None = None,
+    ) -> Columns:
+        """Copy the selected columns/rows out of the mapping into regular arrays and lists."""
+        indices = _matching_rows(self.evaluate, self.num_rows, filters)
+        columns: Columns = {}
+        for name in self.names if names is None else names:
+            if indices is not None:
+                columns[name] = self._take(name, indices[start:stop])
+                continue
+            values = self.column(name, start, stop)
+            if not isinstance(values, memoryview):
+                columns[name] = values
+            elif values.format == "i":
+                columns[name] = array("q", values)
+            else:
+                columns[name] = array(values.format, values.tobytes())
+        return columns
+
+    def _take(self, name: str, indices: list[int]) -> Sequence[Any]:
+        spec = self._specs[name]
+        if spec["kind"] == "dict":
+            dictionary = spec["dictionary"]
+            codes = self._raw(spec, "i")
+            return [dictionary[codes[idx]] for idx in indices]
+        values = self.column(name)
+        if not isinstance(values, memoryview):
+            return [values[idx] for idx in indices]
+        return array("d" if values.format == "d" else "q", [values[idx] for idx in indices])
+
+
+def open_mapped(path: str | Path) -> MappedTable | None:
+    path_obj = Path(path)
+    return MappedTable(path_obj) if _is_binary(path_obj) else None
+
+
+def num_rows(columns: Columns) -> int:
+    for values in columns.values():
+        return len(values)
+    return 0
+
+
+def rows_to_columns(rows: list[dict[str, Any]]) -> Columns:
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    return {key: _typed_column([row.get(key) for row in rows]) for key in keys}
+
+
+def columns_to_rows(columns: Columns) -> list[dict[str, Any]]:
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*(columns[key] for key in keys))]
+
+
+def take_columns(columns: Columns, indices: Sequence[int]) -> Columns:
+    taken: Columns = {}
+    for key, values in columns.items():
+        picked = [values[idx] for idx in indices]
+        taken[key] = array(values.typecode, picked) if isinstance(values, array) else picked
+    return taken
+
+
+def is_sorted_by(columns: Columns, keys: Sequence[str]) -> bool:
+    rows = zip(*(columns[key] for key in keys))
+    previous = next(rows, None)
+    for row in rows:
+        if row < previous:
+            return False
+        previous = row
+    return True
+
+
+def sort_order(columns: Columns, keys: Sequence[str]) -> list[int]:
+    # Rank each key column once, then sort on a single int instead of per-row string tuples.
+    combined = [0] * num_rows(columns)
+    for key in keys:
+        values = columns[key]
+        ranks = {value: rank for rank, value in enumerate(sorted(set(values)))}
+        width = len(ranks)
+        combined = [code * width + ranks[value] for code, value in zip(combined, values)]
+    return sorted(range(len(combined)), key=combined.__getitem__)
+
+
+def sort_columns(columns: Columns, keys: Sequence[str]) -> Columns:
+    if is_sorted_by(columns, keys):
+        return columns
+    return take_columns(columns, sort_order(columns, keys))
+
+
+def concat_columns(tables: Iterable[Columns]) -> Columns:
+    merged: dict[str, Any] = {}
+    for table in tables:
+        for key, values in table.items():
+            target = merged.get(key)
+            if target is None:
+                merged[key] = array(values.typecode, values) if isinstance(values, array) else list(values)
+            elif isinstance(target, array) and not isinstance(values, array):
+                merged[key] = target.tolist() + list(values)
+            else:
+                target.extend(values)
+    return merged
+
+
+def write_columns(
+    path: str | Path, columns: Columns, metadata: dict[str, Any] | None = None
+) -> None:
+    path_obj = Path(path)
+    path_obj.parent.mkdir(parents=True, exist_ok=True)
+
+    if _can_use_parquet():
+        import numpy as np
+        import pandas as pd
+
+        frame = pd.DataFrame(
+            {
+                key: np.asarray(values) if isinstance(values, array) else [_normalize_value(item) for item in values]
+                for key, values in columns.items()
+            }
+        )
+        if not metadata:
+            frame.to_parquet(path_obj, index=False)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        schema_metadata = dict(table.schema.metadata or {})
+        schema_metadata[METADATA_KEY] = json.dumps(metadata).encode("utf-8")
+        pq.write_table(table.replace_schema_metadata(schema_metadata), path_obj)
+        return
+
+    _write_binary(path_obj, columns, metadata)
+
+
+def read_metadata(path: str | Path) -> dict[str, Any]:
+    path_obj = Path(path)
+    if not path_obj.exists():
+        raise FileNotFoundError(f"File not found: {path_obj}")
+
+    if _is_binary(path_obj):
+        with MappedTable(path_obj) as table:
+            return dict(table.metadata)
+    if _can_use_parquet():
+        try:
+            import pyarrow.parquet as pq
+
+            raw = (pq.read_schema(path_obj).metadata or {}).get(METADATA_KEY)
+            return json.loads(raw) if raw else {}
+        except Exception:
+            pass
+    return {}
+
+
+def read_columns(
+    path: str | Path,
+    columns: list[str] | None = None,
+    filters: Filters | None = None,
+) -> Columns:
+    path_obj = Path(path)
+    if not path_obj.exists():
+        raise FileNotFoundError(f"File not found: {path_obj}")
+
+    if _can_use_parquet():
+        try:
+            import pandas as pd
+
+            frame = pd.read_parquet(path_obj, columns=columns, filters=filters or None)
+            selected: Columns = {}
+            for key in frame.columns:
+                series = frame[key]
+                if series.dtype.kind in "iu":
+                    selected[key] = array("q", series.to_numpy(dtype="int64").tobytes())
+                elif series.dtype.kind == "f":
+                    selected[key] = array("d", series.to_numpy(dtype="float64").tobytes())
+                else:
+                    selected[key] = [_normalize_value(item) for item in series.tolist()]
+            return selected
+        except Exception:
+            pass
+
+    if _is_binary(path_obj):
+        with MappedTable(path_obj) as table:
+            return table.read(columns, filters=filters)
+
+    payload = json.loads(path_obj.read_text(encoding="utf-8"))
+    if payload.get("format") == "json_columnar":
+        return _select(_columns_from_payload(path_obj, payload), columns, filters)
+
+    rows = payload.get("rows", [])
+    if not isinstance(rows, list):
+        raise ValueError(f"Invalid table rows in {path_obj}")
+    return _select(rows_to_columns(rows), columns, filters)
+
+
+def scan_columns(
+    path: str | Path, names: Iterable[str] | None = None, start: int = 0, stop: int | None = None
+) -> Columns:
+    """Rows ``start:stop`` of the named columns; zero-copy ``memoryview`` slices for numeric
+    columns of binary files, regular arrays and lists otherwise."""
+    path_obj = Path(path)
+    if not path_obj.exists():
+        raise FileNotFoundError(f"File not found: {path_obj}")
+    if _is_binary(path_obj):
+        with MappedTable(path_obj) as table:
+            return {name: table.column(name, start, stop) for name in (names or table.names)}
+
+    columns = read_columns(path_obj)
+    return {name: columns[name][start:stop] for name in (names or list(columns))}
+
+
 def write_table(path: str | Path, rows: list[dict[str, Any]]) -> None:
     path_obj = Path(path)
     path_obj.parent.mkdir(parents=True, exist_ok=True)
@@ -39,14 +490,14 @@ def write_table(path: str | Path, rows: list[dict[str, Any]]) -> None:
         frame.to_parquet(path_obj, index=False)
         return
 
-    payload = {
-        "format": "json_fallback",
-        "rows": _normalize_rows(rows),
-    }
-    path_obj.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    write_columns(path_obj, rows_to_columns(rows))
 
 
-def read_table(path: str | Path) -> list[dict[str, Any]]:
+def read_table(
+    path: str | Path,
+    columns: list[str] | None = None,
+    filters: Filters | None = None,
+) -> list[dict[str, Any]]:
     path_obj = Path(path)
     if not path_obj.exists():
         raise FileNotFoundError(f"File not found: {path_obj}")
@@ -55,13 +506,22 @@ def read_table(path: str | Path) -> list[dict[str, Any]]:
         try:
             import pandas as pd
 
-            frame = pd.read_parquet(path_obj)
+            frame = pd.read_parquet(path_obj, columns=columns, filters=filters or None)
             return frame.to_dict(orient="records")
         except Exception:
             pass
 
+    if _is_binary(path_obj):
+        with MappedTable(path_obj) as table:
+            return columns_to_rows(table.read(columns, filters=filters))
+
     payload = json.loads(path_obj.read_text(encoding="utf-8"))
+    if payload.get("format") == "json_columnar":
+        return columns_to_rows(_select(_columns_from_payload(path_obj, payload), columns, filters))
+
     rows = payload.get("rows", [])
     if not isinstance(rows, list):
         raise ValueError(f"Invalid table rows in {path_obj}")
-    return rows
+    if columns is None and not filters:
+        return rows
+    return columns_to_rows(_select(rows_to_columns(rows), columns, filters))
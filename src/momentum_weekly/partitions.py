@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterable
+
+from .io_utils import (
+    Columns,
+    open_mapped,
+    scan_columns,
+    sort_order,
+    take_columns,
+    write_columns,
+)
+
+PARTITION_LAYOUTS = ("chunk", "date", "month")
+
+
+def partition_layout(cfg: dict) -> str:
+    layout = str(cfg["data"].get("partition_layout", "chunk") or "chunk").lower()
+    if layout not in PARTITION_LAYOUTS:
+        raise ValueError(f"data.partition_layout must be one of {PARTITION_LAYOUTS}: {layout}")
+    return layout
+
+
+def index_path(dataset_dir: Path, prefix: str) -> Path:
+    return dataset_dir / f"{prefix}_index.json"
+
+
+def _partition_key(day: str, layout: str) -> str:
+    return day if layout == "date" else day[:7]
+
+
+def clear_partitions(dataset_dir: Path, prefix: str) -> None:
+    for stale in dataset_dir.glob(f"{prefix}_part_*.parquet"):
+        stale.unlink()
+    index_file = index_path(dataset_dir, prefix)
+    if index_file.exists():
+        index_file.unlink()
+
+
+def write_partitions(dataset_dir: Path, prefix: str, columns: Columns, layout: str) -> Path:
+    clear_partitions(dataset_dir, prefix)
+    dates = [str(value) for value in columns["date"]]
+    order = sort_order(columns, ["date", "symbol"])
+
+    entries: list[list] = []
+    groups: dict[str, list[int]] = {}
+    for idx in order:
+        groups.setdefault(_partition_key(dates[idx], layout), []).append(idx)
+    for key, indices in groups.items():
+        file_name = f"{prefix}_part_{key}.parquet"
+        write_columns(dataset_dir / file_name, take_columns(columns, indices))
+        start = 0
+        for pos in range(1, len(indices) + 1):
+            if pos == len(indices) or dates[indices[pos]] != dates[indices[start]]:
+                entries.append([dates[indices[start]], file_name, start, pos - start])
+                start = pos
+
+    index_file = index_path(dataset_dir, prefix)
+    index_file.write_text(
+        json.dumps({"layout": layout, "dates": entries}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    return index_file
+
+
+class PartitionIndex:
+    def __init__(self, dataset_dir: Path, prefix: str):
+        index_file = index_path(dataset_dir, prefix)
+        if not index_file.exists():
+            raise FileNotFoundError(f"Partition index not found: {index_file}")
+        payload = json.loads(index_file.read_text(encoding="utf-8"))
+        self.dataset_dir = dataset_dir
+        self.layout = str(payload["layout"])
+        self.dates = [str(item[0]) for item in payload["dates"]]
+        self.locations = {
+            str(day): (str(file_name), int(offset), int(count))
+            for day, file_name, offset, count in payload["dates"]
+        }
+
+    def read_dates(
+        self, days: Iterable[str], names: Iterable[str] | None = None
+    ) -> dict[str, Columns]:
+        wanted = [day for day in days if day in self.locations]
+        by_file: dict[str, list[str]] = {}
+        for day in wanted:
+            by_file.setdefault(self.locations[day][0], []).append(day)
+
+        tables: dict[str, Columns] = {}
+        for file_name, file_days in by_file.items():
+            path = self.dataset_dir / file_name
+            table = open_mapped(path)
+            if table is None:
+                for day in file_days:
+                    _, offset, count = self.locations[day]
+                    tables[day] = scan_columns(path, names, offset, offset + count)
+                continue
+            # One mapping per partition file, shared by the zero-copy views of all its days.
+            with table:
+                for day in file_days:
+                    _, offset, count = self.locations[day]
+                    tables[day] = {
+                        name: table.column(name, offset, offset + count)
+                        for name in (names or table.names)
+                    }
+        return {day: tables[day] for day in wanted}
+
+    def files_for(self, days: Iterable[str]) -> list[str]:
+        return sorted({self.locations[day][0] for day in days if day in self.locations})
+
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import math
 import struct
 import zlib
 from pathlib import Path
+from typing import Sequence
+
+Color = tuple[int, int, int]
 
 
 def _png_chunk(tag: bytes, data: bytes) -> bytes:
@@ -13,19 +15,102 @@ def _png_chunk(tag: bytes, data: bytes) -> bytes:
     return length + tag + data + struct.pack(">I", crc & 0xFFFFFFFF)
 
 
-def _line_points(values: list[float], width: int, height: int, padding: int) -> list[tuple[int, int]]:
+class Canvas:
+    """RGB image in one flat ``bytearray``; rows and columns are filled with slice assignment."""
+
+    def __init__(self, width: int, height: int, background: Color):
+        self.width = width
+        self.height = height
+        self.stride = width * 3
+        self.pixels = bytearray(bytes(background) * (width * height))
+
+    def set(self, x: int, y: int, color: Color) -> None:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            offset = y * self.stride + x * 3
+            self.pixels[offset : offset + 3] = bytes(color)
+
+    def hline(self, y: int, x0: int, x1: int, color: Color) -> None:
+        """Fill ``[x0, x1)`` of row ``y``."""
+        x0, x1 = max(0, x0), min(self.width, x1)
+        if 0 <= y < self.height and x0 < x1:
+            offset = y * self.stride
+            self.pixels[offset + x0 * 3 : offset + x1 * 3] = bytes(color) * (x1 - x0)
+
+    def vline(self, x: int, y0: int, y1: int, color: Color) -> None:
+        """Fill rows ``y0..y1`` (inclusive, any order) of column ``x``."""
+        y0, y1 = max(0, min(y0, y1)), min(self.height - 1, max(y0, y1))
+        if not 0 <= x < self.width or y0 > y1:
+            return
+        count = y1 - y0 + 1
+        start = y0 * self.stride + x * 3
+        stop = y1 * self.stride + x * 3 + 1
+        # One strided assignment per channel instead of one per pixel.
+        for channel, value in enumerate(color):
+            self.pixels[start + channel : stop + channel : self.stride] = bytes((value,)) * count
+
+    def line(self, p0: tuple[int, int], p1: tuple[int, int], color: Color) -> None:
+        x0, y0 = p0
+        x1, y1 = p1
+        if x0 == x1:
+            self.vline(x0, y0, y1, color)
+            return
+
+        dx = abs(x1 - x0)
+        dy = abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx - dy
+        while True:
+            self.set(x0, y0, color)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 > -dy:
+                err -= dy
+                x0 += sx
+            if e2 < dx:
+                err += dx
+                y0 += sy
+
+    def encode_png(self, compression_level: int = 6) -> bytes:
+        stride = self.stride
+        view = memoryview(self.pixels)
+        # Filter type 0 (None) in front of every scanline.
+        raw = b"".join(
+            b"\x00" + view[offset : offset + stride]
+            for offset in range(0, len(self.pixels), stride)
+        )
+        ihdr = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        return b"".join(
+            (
+                b"\x89PNG\r\n\x1a\n",
+                _png_chunk(b"IHDR", ihdr),
+                _png_chunk(b"IDAT", zlib.compress(raw, level=compression_level)),
+                _png_chunk(b"IEND", b""),
+            )
+        )
+
+
+def _scale(v_min: float, v_max: float, y_min: int, y_max: int):
+    if abs(v_max - v_min) < 1e-12:
+        v_max = v_min + 1e-6
+    span = v_max - v_min
+
+    def to_y(value: float) -> int:
+        return y_max - int((y_max - y_min) * ((value - v_min) / span))
+
+    return to_y
+
+
+def _line_points(
+    values: Sequence[float], width: int, height: int, padding: int
+) -> list[tuple[int, int]]:
     if not values:
         return []
 
     x_min = padding
     x_max = width - padding - 1
-    y_min = padding
-    y_max = height - padding - 1
-
-    v_min = min(values)
-    v_max = max(values)
-    if abs(v_max - v_min) < 1e-12:
-        v_max = v_min + 1e-6
+    to_y = _scale(min(values), max(values), padding, height - padding - 1)
 
     n = len(values)
     points: list[tuple[int, int]] = []
@@ -34,86 +119,73 @@ def _line_points(values: list[float], width: int, height: int, padding: int) ->
             x = (x_min + x_max) // 2
         else:
             x = x_min + int((x_max - x_min) * idx / (n - 1))
-        ratio = (value - v_min) / (v_max - v_min)
-        y = y_max - int((y_max - y_min) * ratio)
-        points.append((x, y))
+        points.append((x, to_y(value)))
     return points
 
 
-def _draw_line(pixels: list[list[tuple[int, int, int]]], p0: tuple[int, int], p1: tuple[int, int], color: tuple[int, int, int]) -> None:
-    x0, y0 = p0
-    x1, y1 = p1
-
-    dx = abs(x1 - x0)
-    dy = abs(y1 - y0)
-    sx = 1 if x0 < x1 else -1
-    sy = 1 if y0 < y1 else -1
-    err = dx - dy
-
-    width = len(pixels[0])
-    height = len(pixels)
-
-    while True:
-        if 0 <= x0 < width and 0 <= y0 < height:
-            pixels[y0][x0] = color
-        if x0 == x1 and y0 == y1:
-            break
-        e2 = 2 * err
-        if e2 > -dy:
-            err -= dy
-            x0 += sx
-        if e2 < dx:
-            err += dx
-            y0 += sy
-
-
-def _draw_axes(pixels: list[list[tuple[int, int, int]]], width: int, height: int, padding: int) -> None:
-    axis_color = (180, 180, 180)
-    for x in range(padding, width - padding):
-        pixels[height - padding][x] = axis_color
-    for y in range(padding, height - padding + 1):
-        pixels[y][padding] = axis_color
+def _column_spans(
+    values: Sequence[float], width: int, height: int, padding: int
+) -> list[tuple[int, int, int]]:
+    """Min/max downsampling: one ``(x, y_top, y_bottom)`` span per pixel column.
 
+    Each span also reaches the previous column's last value so the curve stays connected."""
+    x_min = padding
+    x_max = width - padding - 1
+    to_y = _scale(min(values), max(values), padding, height - padding - 1)
 
-def save_nav_curve_png(path: str | Path, nav_values: list[float]) -> None:
+    n = len(values)
+    columns = x_max - x_min
+    if columns <= 0:
+        # The plot area is a single pixel column (or none): draw the whole range there.
+        return [(x_min, to_y(max(values)), to_y(min(values)))]
+    spans: list[tuple[int, int, int]] = []
+    previous_last: float | None = None
+    lo = 0
+    for column in range(columns + 1):
+        # Indices mapped to this column by _line_points: idx * columns // (n - 1) == column.
+        hi = min(n, -(-(column + 1) * (n - 1) // columns))
+        if hi <= lo:
+            continue
+        bucket = values[lo:hi]
+        low, high = min(bucket), max(bucket)
+        if previous_last is not None:
+            low, high = min(low, previous_last), max(high, previous_last)
+        spans.append((x_min + column, to_y(high), to_y(low)))
+        previous_last = values[hi - 1]
+        lo = hi
+    return spans
+
+
+def save_nav_curve_png(
+    path: str | Path,
+    nav_values: Sequence[float],
+    width: int = 960,
+    height: int = 480,
+    compression_level: int = 6,
+) -> None:
     output = Path(path)
     output.parent.mkdir(parents=True, exist_ok=True)
 
-    width = 960
-    height = 480
     padding = 40
-
     white = (250, 250, 250)
     line_color = (30, 110, 220)
     grid_color = (230, 230, 230)
+    axis_color = (180, 180, 180)
 
-    pixels: list[list[tuple[int, int, int]]] = [
-        [white for _ in range(width)] for _ in range(height)
-    ]
-
+    canvas = Canvas(width, height, white)
     for gy in range(padding, height - padding, 50):
-        for x in range(padding, width - padding):
-            pixels[gy][x] = grid_color
-
-    _draw_axes(pixels, width, height, padding)
-
-    points = _line_points(nav_values, width, height, padding)
-    for idx in range(1, len(points)):
-        _draw_line(pixels, points[idx - 1], points[idx], line_color)
-
-    raw = bytearray()
-    for row in pixels:
-        raw.append(0)
-        for (r, g, b) in row:
-            raw.extend([r, g, b])
-
-    compressed = zlib.compress(bytes(raw), level=9)
-    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
-
-    png = bytearray()
-    png.extend(b"\x89PNG\r\n\x1a\n")
-    png.extend(_png_chunk(b"IHDR", ihdr))
-    png.extend(_png_chunk(b"IDAT", compressed))
-    png.extend(_png_chunk(b"IEND", b""))
-    output.write_bytes(bytes(png))
-
+        canvas.hline(gy, padding, width - padding, grid_color)
+    canvas.hline(height - padding, padding, width - padding, axis_color)
+    canvas.vline(padding, padding, height - padding, axis_color)
+
+    # Past two points per pixel column, segments overlap anyway: draw per-column min/max
+    # spans so the cost depends on the chart width, not on the length of the series.
+    if len(nav_values) > 2 * (width - 2 * padding):
+        for x, y_top, y_bottom in _column_spans(nav_values, width, height, padding):
+            canvas.vline(x, y_top, y_bottom, line_color)
+    else:
+        points = _line_points(nav_values, width, height, padding)
+        for idx in range(1, len(points)):
+            canvas.line(points[idx - 1], points[idx], line_color)
+
+    output.write_bytes(canvas.encode_png(compression_level))
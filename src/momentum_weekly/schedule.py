@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+WEEKDAY_NAMES = ("周一", "周二", "周三", "周四", "周五", "周六", "周日")
+REBALANCE_KINDS = ("daily", "weekly", "monthly", "every")
+
+
+def parse_rebalance(spec: object) -> tuple[str, int | str]:
+    """``strategy.rebalance`` -> (kind, argument).
+
+    daily | weekly[:mon..sun] (default fri) | monthly[:first|last] (default last) | every:N
+    (every N trading days, counted from the first day of the calendar)."""
+    text = str(spec or "weekly").strip().lower()
+    kind, _, argument = text.partition(":")
+    argument = argument.strip()
+    if kind == "daily" and not argument:
+        return kind, 0
+    if kind == "weekly":
+        weekday = argument[:3] or "fri"
+        if weekday in WEEKDAYS:
+            return kind, WEEKDAYS.index(weekday)
+    if kind == "monthly" and argument in ("", "first", "last"):
+        return kind, argument or "last"
+    if kind == "every" and argument.isdigit() and int(argument) > 0:
+        return kind, int(argument)
+    raise ValueError(
+        "strategy.rebalance must be daily, weekly[:mon..sun], monthly[:first|last] "
+        f"or every:N, got {spec!r}"
+    )
+
+
+def rebalance_spec(cfg: dict) -> str:
+    # A missing or null key keeps the historical weekly schedule.
+    spec = str(cfg["strategy"].get("rebalance") or "weekly")
+    parse_rebalance(spec)
+    return spec
+
+
+def schedule_positions(trading_days: list[date], spec: object) -> array:
+    """Positions of the signal days of ``spec`` over the whole trading calendar."""
+    kind, argument = parse_rebalance(spec)
+    total = len(trading_days)
+    if kind == "daily":
+        return array("i", range(total))
+    if kind == "every":
+        return array("i", range(0, total, int(argument)))
+    if kind == "weekly":
+        weekdays = [day.weekday() for day in trading_days]
+        return array("i", [pos for pos in range(total) if weekdays[pos] == argument])
+
+    # Month edges are only confirmed by a neighbouring day of another month: the calendar may
+    # start mid-month just as it may stop mid-month, so neither outer day counts on its own.
+    months = [(day.year, day.month) for day in trading_days]
+    if argument == "first":
+        return array("i", [pos for pos in range(1, total) if months[pos] != months[pos - 1]])
+    return array("i", [pos for pos in range(total - 1) if months[pos] != months[pos + 1]])
+
+
+def describe_rebalance(spec: object) -> str:
+    kind, argument = parse_rebalance(spec)
+    if kind == "daily":
+        return "每个交易日"
+    if kind == "weekly":
+        return f"每周一次（{WEEKDAY_NAMES[int(argument)]}）"
+    if kind == "monthly":
+        return "每月一次（月初首个交易日）" if argument == "first" else "每月一次（月末最后交易日）"
+    return f"每 {argument} 个交易日"
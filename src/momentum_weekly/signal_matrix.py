@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date
+from datetime import datetime
+
+from .dictionaries import SymbolTable, TradingCalendar, build_dictionaries
+from .io_utils import Columns
+
+NAN = float("nan")
+
+
+def _to_date(value: object) -> date:
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
+class SignalMatrix:
+    """Dense (day x symbol) view of signal rows, stored row-major in flat arrays.
+
+    Missing cells hold 0.0 for open (never tradable) and NaN for close/score; price-only
+    tables (no score column) leave every score cell NaN.
+    """
+
+    def __init__(
+        self,
+        days: list[date],
+        symbols: list[str],
+        open_prices: array,
+        close_prices: array,
+        scores: array,
+    ):
+        self.days = days
+        self.symbols = symbols
+        self.day_index = {day: pos for pos, day in enumerate(days)}
+        self.symbol_ids = {symbol: sid for sid, symbol in enumerate(symbols)}
+        self.num_days = len(days)
+        self.num_symbols = len(symbols)
+        self.open = open_prices
+        self.close = close_prices
+        self.score = scores
+
+    def row(self, values: array, day_pos: int) -> array:
+        start = day_pos * self.num_symbols
+        return values[start : start + self.num_symbols]
+
+    def column(self, values: array, symbol_id: int) -> array:
+        return values[symbol_id :: self.num_symbols]
+
+    def with_scores(self, scores: array) -> SignalMatrix:
+        return SignalMatrix(self.days, self.symbols, self.open, self.close, scores)
+
+
+def build_signal_matrix(
+    signals: Columns,
+    dictionaries: tuple[SymbolTable, TradingCalendar] | None = None,
+    keys: tuple[array, array] | None = None,
+) -> SignalMatrix:
+    """Dense matrix of the rows of ``signals``.
+
+    ``keys`` are the global (symbol ID, day index) codes of every row, as returned by
+    ``dictionaries.read_keys``; rows are then placed with integer lookups only. Without them
+    the symbol and date strings are interned here first."""
+    if keys is None:
+        dictionaries = build_dictionaries([signals])
+        symbol_table, calendar = dictionaries
+        keys = (symbol_table.encode(signals["symbol"]), calendar.encode(signals["date"]))
+    symbol_table, calendar = dictionaries
+    symbol_ids, day_ids = keys
+
+    # Compact the global codes to the days and symbols actually present.
+    used_days = sorted(set(day_ids))
+    used_symbols = sorted(set(symbol_ids))
+    day_pos = [0] * len(calendar)
+    for pos, day in enumerate(used_days):
+        day_pos[day] = pos
+    symbol_pos = [0] * len(symbol_table)
+    for pos, sid in enumerate(used_symbols):
+        symbol_pos[sid] = pos
+
+    width = len(used_symbols)
+    size = len(used_days) * width
+    open_prices = array("d", bytes(8 * size))
+    close_prices = array("d", [NAN]) * size
+    scores = array("d", [NAN]) * size
+
+    cells = [day_pos[day] * width + symbol_pos[sid] for day, sid in zip(day_ids, symbol_ids)]
+    for cell, open_price, close_price in zip(cells, signals["open"], signals["close"]):
+        open_prices[cell] = float(open_price)
+        close_prices[cell] = float(close_price)
+    if "score" in signals:
+        for cell, score in zip(cells, signals["score"]):
+            scores[cell] = float(score)
+
+    days = [calendar.dates[day] for day in used_days]
+    symbols = [symbol_table.symbols[sid] for sid in used_symbols]
+    return SignalMatrix(days, symbols, open_prices, close_prices, scores)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+ENTRY_NAME = "entry.json"
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stat_key(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    try:
+        os.link(source, target)
+    except OSError:
+        # Different filesystem (or no hardlink support): fall back to a real copy.
+        shutil.copy2(source, target)
+
+
+def _detach(paths: list[Path]) -> None:
+    """Give hardlinked outputs their own inode so in-place writers leave cache entries alone."""
+    for path in paths:
+        if path.stat().st_nlink > 1:
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            shutil.copy2(path, tmp_path)
+            os.replace(tmp_path, path)
+
+
+def config_subset(cfg: dict, keys: Iterable[str]) -> dict[str, Any]:
+    subset: dict[str, Any] = {}
+    for dotted in keys:
+        node: Any = cfg
+        for part in dotted.split("."):
+            node = node.get(part) if isinstance(node, dict) else None
+        subset[dotted] = node
+    return subset
+
+
+def _marker(output_dir: Path, stage: str) -> Path:
+    return output_dir / f".{stage}.fingerprint"
+
+
+def invalidate(output_dir: Path, stage: str) -> None:
+    """Forget which cache key ``output_dir`` holds, e.g. after another writer replaced it."""
+    _marker(output_dir, stage).unlink(missing_ok=True)
+
+
+def _collect(output_dir: Path, patterns: list[str]) -> list[Path]:
+    files: set[Path] = set()
+    for pattern in patterns:
+        files.update(path for path in output_dir.glob(pattern) if path.is_file())
+    return sorted(files)
+
+
+class StageCache:
+    def __init__(self, root: str | Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def fingerprint(self, stage: str, config: dict[str, Any], inputs: list[Path]) -> str:
+        digest = hashlib.sha256()
+        digest.update(stage.encode("utf-8"))
+        digest.update(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+        for path in sorted(inputs):
+            digest.update(path.name.encode("utf-8"))
+            digest.update(_file_digest(path).encode("ascii"))
+        return digest.hexdigest()
+
+    def _entry_dir(self, stage: str, key: str) -> Path:
+        return self.root / stage / key
+
+    def _entry_files(self, stage: str, key: str) -> dict[str, dict[str, Any]] | None:
+        """File name -> {sha256, size, mtime_ns}, or None for a missing/incomplete entry."""
+        entry_dir = self._entry_dir(stage, key)
+        entry_path = entry_dir / ENTRY_NAME
+        if not entry_path.exists():
+            return None
+        files = json.loads(entry_path.read_text(encoding="utf-8")).get("files")
+        if not isinstance(files, dict):
+            return None
+        for name, record in files.items():
+            path = entry_dir / name
+            if not path.is_file():
+                return None
+            # A hardlinked output rewritten in place also changes the entry's copy.
+            if _stat_key(path) != (record["size"], record["mtime_ns"]):
+                if _file_digest(path) != record["sha256"]:
+                    return None
+        return files
+
+    def is_current(self, stage: str, key: str, output_dir: Path) -> bool:
+        marker = _marker(output_dir, stage)
+        if not marker.exists() or marker.read_text(encoding="utf-8").strip() != key:
+            return False
+        files = self._entry_files(stage, key)
+        if files is None:
+            return False
+        for name, record in files.items():
+            output_path = output_dir / name
+            if not output_path.is_file():
+                return False
+            if _stat_key(output_path) == (record["size"], record["mtime_ns"]):
+                continue
+            # Same-sized outputs are common (fixed-width columns), so compare content.
+            if _file_digest(output_path) != record["sha256"]:
+                return False
+        os.utime(self._entry_dir(stage, key) / ENTRY_NAME)
+        return True
+
+    def restore(self, stage: str, key: str, output_dir: Path, patterns: list[str]) -> bool:
+        files = self._entry_files(stage, key)
+        if files is None:
+            return False
+        entry_dir = self._entry_dir(stage, key)
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for stale in _collect(output_dir, patterns):
+            stale.unlink()
+        for name in files:
+            _link_or_copy(entry_dir / name, output_dir / name)
+        os.utime(entry_dir / ENTRY_NAME)
+        _marker(output_dir, stage).write_text(key, encoding="utf-8")
+        return True
+
+    def store(self, stage: str, key: str, output_dir: Path, patterns: list[str]) -> None:
+        entry_dir = self._entry_dir(stage, key)
+        if entry_dir.exists():
+            shutil.rmtree(entry_dir)
+        entry_dir.mkdir(parents=True)
+        files: dict[str, dict[str, Any]] = {}
+        for path in _collect(output_dir, patterns):
+            _link_or_copy(path, entry_dir / path.name)
+            size, mtime_ns = _stat_key(entry_dir / path.name)
+            files[path.name] = {"sha256": _file_digest(path), "size": size, "mtime_ns": mtime_ns}
+        (entry_dir / ENTRY_NAME).write_text(
+            json.dumps({"stage": stage, "files": files}),
+            encoding="utf-8",
+        )
+        _marker(output_dir, stage).write_text(key, encoding="utf-8")
+        self.evict()
+
+    def evict(self) -> list[Path]:
+        entries: list[tuple[float, int, Path]] = []
+        for entry_path in self.root.glob(f"*/*/{ENTRY_NAME}"):
+            entry_dir = entry_path.parent
+            size = sum(path.stat().st_size for path in entry_dir.iterdir() if path.is_file())
+            entries.append((entry_path.stat().st_mtime, size, entry_dir))
+
+        total = sum(size for _, size, _ in entries)
+        removed: list[Path] = []
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            removed.append(entry_dir)
+        return removed
+
+
+def create_stage_cache(cfg: dict) -> StageCache | None:
+    cache_cfg = cfg.get("cache", {}) or {}
+    if not cache_cfg.get("enabled", False):
+        return None
+    max_bytes = int(float(cache_cfg.get("max_mb", 2048)) * 1024 * 1024)
+    return StageCache(cache_cfg.get("dir", ".cache/stages"), max_bytes)
+
+
+def run_cached_stage(
+    cfg: dict,
+    stage: str,
+    config_keys: list[str],
+    inputs: list[Path],
+    output_dir: Path,
+    patterns: list[str],
+    run: Callable[[], None],
+) -> bool:
+    cache = create_stage_cache(cfg)
+    if cache is None:
+        run()
+        return False
+
+    key = cache.fingerprint(stage, config_subset(cfg, config_keys), inputs)
+    if cache.is_current(stage, key, output_dir):
+        print(f"[{stage}] cache hit key={key[:12]}, outputs up to date, skipped")
+        return True
+    if cache.restore(stage, key, output_dir, patterns):
+        print(f"[{stage}] cache hit key={key[:12]}, restored -> {output_dir}")
+        return True
+
+    _detach(_collect(output_dir, patterns))
+    run()
+    cache.store(stage, key, output_dir, patterns)
+    return False
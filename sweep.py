@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import itertools
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+from backtest import backtest_window, build_rank_index, rebalance_positions, run_backtest
+from signals import combine_momentum, compute_momentum_matrix
+from src.momentum_weekly.config_utils import ensure_dir, load_config
+from src.momentum_weekly.dictionaries import concat_keys, load_keys
+from src.momentum_weekly.io_utils import concat_columns, read_columns, write_table
+from src.momentum_weekly.schedule import rebalance_spec
+from src.momentum_weekly.signal_matrix import SignalMatrix, build_signal_matrix
+
+_SHARED: dict[str, object] = {}
+
+
+def _parse_list(text: str, cast) -> list:
+    return [cast(item) for item in text.split(",") if item.strip()]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Evaluate a grid of strategy/backtest parameters in one run."
+    )
+    parser.add_argument("--top-n", nargs="+", type=int, help="e.g. --top-n 10 20 30")
+    parser.add_argument(
+        "--mom-windows",
+        nargs="+",
+        help="comma separated window sets, e.g. --mom-windows 60,120 20,60",
+    )
+    parser.add_argument(
+        "--weights",
+        nargs="+",
+        help="comma separated weight sets, e.g. --weights 0.5,0.5 0.3,0.7",
+    )
+    parser.add_argument("--buy-cost", nargs="+", type=float)
+    parser.add_argument("--sell-cost", nargs="+", type=float)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: sweep.workers or 1)",
+    )
+    return parser.parse_args(argv)
+
+
+def build_grid(cfg: dict, args: argparse.Namespace) -> list[dict]:
+    strategy_cfg = cfg["strategy"]
+    backtest_cfg = cfg["backtest"]
+    top_ns = args.top_n or [int(strategy_cfg["top_n"])]
+    window_sets = (
+        [_parse_list(item, int) for item in args.mom_windows]
+        if args.mom_windows
+        else [[int(x) for x in strategy_cfg["mom_windows"]]]
+    )
+    weight_sets = (
+        [_parse_list(item, float) for item in args.weights]
+        if args.weights
+        else [[float(x) for x in strategy_cfg["weights"]]]
+    )
+    buy_costs = args.buy_cost or [float(backtest_cfg["buy_cost"])]
+    sell_costs = args.sell_cost or [float(backtest_cfg["sell_cost"])]
+
+    grid: list[dict] = []
+    for mom_windows, weights in itertools.product(window_sets, weight_sets):
+        if not mom_windows or len(mom_windows) != len(weights):
+            continue
+        if any(window <= 0 for window in mom_windows):
+            raise ValueError(f"mom_windows must be positive: {mom_windows}")
+        grid.append(
+            {
+                "mom_windows": mom_windows,
+                "weights": weights,
+                "top_n": sorted(set(top_ns)),
+                "costs": list(itertools.product(buy_costs, sell_costs)),
+            }
+        )
+    if not grid:
+        raise ValueError("No valid sweep combination: mom_windows and weights length mismatch")
+    return grid
+
+
+def load_price_matrix(prepared_dir: Path) -> SignalMatrix:
+    files = sorted(prepared_dir.glob("prepared_chunk_*.parquet"))
+    if not files:
+        raise FileNotFoundError("No prepared chunks found. Please run prepare_data.py first.")
+    dictionaries, file_keys = load_keys(prepared_dir, files)
+    return build_signal_matrix(
+        concat_columns(read_columns(file_path, columns=["open", "close"]) for file_path in files),
+        dictionaries,
+        concat_keys(file_keys),
+    )
+
+
+def build_tasks(grid: list[dict], pool_size: int) -> list[tuple[int, list[tuple]]]:
+    """Split every score set's (top_n, costs) combinations into ``(score_set, combos)`` tasks,
+    so a grid with a single score set still spreads over the pool."""
+    combos = [list(itertools.product(task["top_n"], task["costs"])) for task in grid]
+    total = sum(len(items) for items in combos)
+    size = max(1, -(-total // (4 * pool_size))) if pool_size > 1 else total
+    return [
+        (score_set, items[start : start + size])
+        for score_set, items in enumerate(combos)
+        for start in range(0, len(items), size)
+    ]
+
+
+def _pool_context():
+    """Fork start method where available, in place of explicit shared memory.
+
+    Forked workers read the parent's price and momentum arrays copy-on-write; spawn-only
+    platforms pickle them once per worker through the initializer, never per task."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def _init_worker(
+    cfg: dict, grid: list[dict], matrix: SignalMatrix, momentum: dict[int, array]
+) -> None:
+    _SHARED["cfg"] = cfg
+    _SHARED["grid"] = grid
+    _SHARED["matrix"] = matrix
+    _SHARED["momentum"] = momentum
+    _SHARED["ranked"] = None
+
+
+def _ranked(score_set: int):
+    # Tasks of one score set are queued back to back, so one cached ranking per worker
+    # saves recombining the scores for every chunk.
+    cached = _SHARED["ranked"]
+    if cached is not None and cached[0] == score_set:
+        return cached[1], cached[2]
+    base_cfg = _SHARED["cfg"]
+    task = _SHARED["grid"][score_set]
+    matrix = combine_momentum(
+        _SHARED["matrix"], _SHARED["momentum"], task["mom_windows"], task["weights"]
+    )
+    positions = rebalance_positions(
+        matrix.days, backtest_window(base_cfg), rebalance_spec(base_cfg)
+    )
+    rank_index = build_rank_index(matrix, max(task["top_n"]), positions)
+    _SHARED["ranked"] = (score_set, matrix, rank_index)
+    return matrix, rank_index
+
+
+def evaluate_combos(work: tuple[int, list[tuple]]) -> list[dict]:
+    score_set, combos = work
+    base_cfg = _SHARED["cfg"]
+    task = _SHARED["grid"][score_set]
+    matrix, rank_index = _ranked(score_set)
+
+    results: list[dict] = []
+    for top_n, (buy_cost, sell_cost) in combos:
+        cfg = copy.deepcopy(base_cfg)
+        cfg["strategy"].update(
+            {"top_n": top_n, "mom_windows": task["mom_windows"], "weights": task["weights"]}
+        )
+        cfg["backtest"].update({"buy_cost": buy_cost, "sell_cost": sell_cost})
+        _, metrics = run_backtest(cfg, matrix, rank_index)
+
+        row = {
+            "top_n": top_n,
+            "mom_windows": ",".join(str(x) for x in task["mom_windows"]),
+            "weights": ",".join(str(x) for x in task["weights"]),
+            "buy_cost": buy_cost,
+            "sell_cost": sell_cost,
+        }
+        row.update({str(item["metric"]): float(item["value"]) for item in metrics})
+        results.append(row)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    cfg = load_config("config.yaml")
+    sweep_cfg = cfg.get("sweep", {}) or {}
+    result_dir = ensure_dir(sweep_cfg.get("result_dir", "outputs/sweep"))
+    workers = args.workers if args.workers is not None else int(sweep_cfg.get("workers", 1))
+
+    grid = build_grid(cfg, args)
+    matrix = load_price_matrix(Path(cfg["data"]["prepared_dir"]))
+    windows = sorted({window for task in grid for window in task["mom_windows"]})
+    momentum = {window: compute_momentum_matrix(matrix, window) for window in windows}
+
+    combos = sum(len(task["top_n"]) * len(task["costs"]) for task in grid)
+    print(
+        f"[sweep] combos={combos} score_sets={len(grid)} windows={windows} "
+        f"days={matrix.num_days} symbols={matrix.num_symbols} workers={workers}"
+    )
+
+    pool_size = min(max(1, workers), combos)
+    tasks = build_tasks(grid, pool_size)
+    rows: list[dict] = []
+    runs = [0] * len(grid)
+    if pool_size > 1:
+        # Workers receive the matrix once through the initializer instead of per task.
+        pool_cm = ProcessPoolExecutor(
+            max_workers=pool_size,
+            mp_context=_pool_context(),
+            initializer=_init_worker,
+            initargs=(cfg, grid, matrix, momentum),
+        )
+    else:
+        _init_worker(cfg, grid, matrix, momentum)
+        pool_cm = nullcontext()
+    with pool_cm as pool:
+        mapper = pool.map if pool is not None else map
+        for (score_set, _), task_rows in zip(tasks, mapper(evaluate_combos, tasks)):
+            rows.extend(task_rows)
+            runs[score_set] += len(task_rows)
+    for task, count in zip(grid, runs):
+        print(f"[sweep] windows={task['mom_windows']} weights={task['weights']} runs={count}")
+
+    metrics_path = result_dir / "sweep_metrics.parquet"
+    write_table(metrics_path, rows)
+    print(f"[sweep] metrics={metrics_path}")
+    print("[sweep] done")
+
+
+if __name__ == "__main__":
+    main()
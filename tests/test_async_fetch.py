@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import pytest
+
+from src.momentum_weekly.async_fetch import AsyncFetcher
+from src.momentum_weekly.data_provider import LatencyMockProvider, TransientFetchError
+
+START, END = "2023-01-02", "2023-02-28"
+
+
+class FlakyProvider(LatencyMockProvider):
+    """Fails the first ``failures`` attempts of every request and records peak concurrency."""
+
+    def __init__(self, failures: int, latency: float = 0.01):
+        super().__init__(seed=7, origin_date=START, latency=latency)
+        self.failures = failures
+        self.attempts: dict[tuple[str, ...], int] = {}
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get_price_data_async(self, symbols, start_date, end_date, columnar=False):
+        key = tuple(symbols)
+        self.attempts[key] = self.attempts.get(key, 0) + 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if self.attempts[key] <= self.failures:
+            raise TransientFetchError(f"flaky {key}")
+        return self.get_price_data(symbols, start_date, end_date, columnar)
+
+
+def _requests(provider, count):
+    return [([symbol], START, END) for symbol in provider.get_universe(count)]
+
+
+def test_retries_transient_failures_and_keeps_request_order():
+    provider = FlakyProvider(failures=2)
+    fetcher = AsyncFetcher(provider, concurrency=3, retries=3, backoff=0.001)
+    requests = _requests(provider, 6)
+
+    results = asyncio.run(fetcher.fetch_all(requests))
+
+    assert fetcher.retried == 2 * len(requests)
+    assert fetcher.requests == 3 * len(requests)
+    assert provider.peak <= 3
+    for (symbols, start, end), result in zip(requests, results):
+        assert set(result["symbol"]) == set(symbols)
+        assert result == provider.get_price_data(symbols, start, end, columnar=True)
+
+
+def test_gives_up_after_the_retry_budget():
+    provider = FlakyProvider(failures=5)
+    fetcher = AsyncFetcher(provider, concurrency=2, retries=2, backoff=0.001)
+
+    with pytest.raises(TransientFetchError):
+        asyncio.run(fetcher.fetch_all(_requests(provider, 2)))
+
+
+def test_injected_failures_of_latency_mock_are_retried():
+    provider = LatencyMockProvider(seed=7, origin_date=START, latency=0.005, fail_every=3)
+    fetcher = AsyncFetcher(provider, concurrency=4, retries=3, backoff=0.001)
+    requests = _requests(provider, 8)
+
+    results = asyncio.run(fetcher.fetch_all(requests))
+
+    assert fetcher.retried > 0
+    assert [sorted(set(result["symbol"])) for result in results] == [
+        symbols for symbols, _, _ in requests
+    ]
+
+
+def test_token_bucket_paces_requests():
+    provider = FlakyProvider(failures=0, latency=0.0)
+    fetcher = AsyncFetcher(provider, concurrency=8, rate=50.0, burst=1.0)
+
+    started = time.monotonic()
+    asyncio.run(fetcher.fetch_all(_requests(provider, 6)))
+    elapsed = time.monotonic() - started
+
+    # One token up front, then one every 1/50 s for the remaining five requests.
+    assert elapsed >= 5 / 50 * 0.9
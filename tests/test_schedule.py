@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+
+from src.momentum_weekly.schedule import parse_rebalance, schedule_positions
+
+
+def _weekdays(start: date, end: date) -> list[date]:
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    return [day for day in days if day.weekday() < 5]
+
+
+def _scheduled(days: list[date], spec: str) -> list[date]:
+    return [days[pos] for pos in schedule_positions(days, spec)]
+
+
+def test_monthly_edges_are_skipped_when_data_starts_and_stops_mid_month():
+    days = _weekdays(date(2023, 1, 16), date(2023, 4, 12))
+
+    assert _scheduled(days, "monthly:first") == [
+        date(2023, 2, 1),
+        date(2023, 3, 1),
+        date(2023, 4, 3),
+    ]
+    assert _scheduled(days, "monthly:last") == [
+        date(2023, 1, 31),
+        date(2023, 2, 28),
+        date(2023, 3, 31),
+    ]
+
+
+def test_monthly_outer_days_are_never_confirmed_edges():
+    days = _weekdays(date(2023, 2, 1), date(2023, 3, 31))
+
+    assert _scheduled(days, "monthly:first") == [date(2023, 3, 1)]
+    assert _scheduled(days, "monthly:last") == [date(2023, 2, 28)]
+
+
+def test_weekly_and_every_specs():
+    days = _weekdays(date(2023, 1, 2), date(2023, 1, 31))
+
+    assert all(day.weekday() == 4 for day in _scheduled(days, "weekly"))
+    assert _scheduled(days, "weekly:mon")[0] == date(2023, 1, 2)
+    assert list(schedule_positions(days, "every:5")) == [0, 5, 10, 15, 20]
+    assert parse_rebalance(None) == ("weekly", 4)
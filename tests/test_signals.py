@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+from signals import score_all
+from src.momentum_weekly.io_utils import (
+    columns_to_rows,
+    concat_columns,
+    read_columns,
+    write_columns,
+)
+
+MOM_WINDOWS = [5, 10]
+WEIGHTS = [0.5, 0.5]
+
+
+def _prepared(symbols, num_days):
+    days = [(date(2023, 1, 2) + timedelta(days=offset)).isoformat() for offset in range(num_days)]
+    # Closes depend only on the symbol and the day, so dropping a symbol leaves the rest as is.
+    rows = [
+        {"symbol": symbol, "date": day, "close": ord(symbol[0]) + 0.1 * pos + (pos % 3) * 0.05}
+        for symbol in symbols
+        for pos, day in enumerate(days)
+    ]
+    return {name: [row[name] for row in rows] for name in ("symbol", "date", "close")}
+
+
+def _write_prepared(directory, columns):
+    path = directory / "prepared_chunk_001.parquet"
+    write_columns(path, columns, {"sorted_by": ["symbol", "date"]})
+    return path
+
+
+def _signal_rows(signal_dir):
+    parts = sorted(signal_dir.glob("signals_chunk_001*.parquet"))
+    rows = columns_to_rows(concat_columns(read_columns(path) for path in parts))
+    return sorted(rows, key=lambda row: (row["date"], row["symbol"]))
+
+
+def test_incremental_run_drops_symbols_that_left_the_chunk(tmp_path):
+    incremental_dir = tmp_path / "incremental"
+    full_dir = tmp_path / "full"
+    for directory in (incremental_dir, full_dir):
+        (directory / "signals").mkdir(parents=True)
+
+    prepared_file = _write_prepared(incremental_dir, _prepared(["AAA", "BBB", "CCC"], 30))
+    score_all(incremental_dir / "signals", [prepared_file], MOM_WINDOWS, WEIGHTS, False)
+
+    shrunk = _prepared(["AAA", "CCC"], 40)
+    prepared_file = _write_prepared(incremental_dir, shrunk)
+    score_all(incremental_dir / "signals", [prepared_file], MOM_WINDOWS, WEIGHTS, True)
+
+    full_file = _write_prepared(full_dir, shrunk)
+    score_all(full_dir / "signals", [full_file], MOM_WINDOWS, WEIGHTS, False)
+
+    incremental_rows = _signal_rows(incremental_dir / "signals")
+    assert {row["symbol"] for row in incremental_rows} == {"AAA", "CCC"}
+    assert incremental_rows == _signal_rows(full_dir / "signals")
+
+
+def test_incremental_run_appends_only_new_bars(tmp_path):
+    signal_dir = tmp_path / "signals"
+    signal_dir.mkdir()
+    prepared_file = _write_prepared(tmp_path, _prepared(["AAA", "BBB"], 30))
+    score_all(signal_dir, [prepared_file], MOM_WINDOWS, WEIGHTS, False)
+
+    extended = _prepared(["AAA", "BBB"], 40)
+    prepared_file = _write_prepared(tmp_path, extended)
+    score_all(signal_dir, [prepared_file], MOM_WINDOWS, WEIGHTS, True)
+    delta = read_columns(signal_dir / "signals_chunk_001_delta001.parquet")
+    assert len(delta["symbol"]) == 2 * 10
+
+    full_dir = tmp_path / "full"
+    full_dir.mkdir()
+    score_all(full_dir, [prepared_file], MOM_WINDOWS, WEIGHTS, False)
+    assert _signal_rows(signal_dir) == _signal_rows(full_dir)
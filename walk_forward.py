@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import argparse
+import copy
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import date, timedelta
+from pathlib import Path
+
+from backtest import (
+    RankIndex,
+    build_rank_index,
+    load_signal_matrix,
+    rebalance_positions,
+    run_backtest,
+)
+from src.momentum_weekly.config_utils import ensure_dir, load_config
+from src.momentum_weekly.io_utils import write_table
+from src.momentum_weekly.schedule import rebalance_spec
+from src.momentum_weekly.signal_matrix import SignalMatrix
+
+_SHARED: dict[str, object] = {}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run the backtest over rolling sub-windows of the signal history."
+    )
+    parser.add_argument(
+        "--window-months",
+        nargs="+",
+        type=int,
+        help="window lengths in months, e.g. --window-months 12 36 "
+        "(default: walk_forward.window_months)",
+    )
+    parser.add_argument(
+        "--step-months",
+        type=int,
+        default=None,
+        help="months between window starts (default: walk_forward.step_months or 1)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: walk_forward.workers or 1)",
+    )
+    return parser.parse_args(argv)
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def build_windows(
+    trading_days: list[date], window_months: list[int], step_months: int
+) -> list[tuple[int, date, date]]:
+    """Calendar-month windows ``(months, start, end)`` that fit inside the trading history."""
+    if not trading_days or step_months <= 0:
+        return []
+    first_month = date(trading_days[0].year, trading_days[0].month, 1)
+    last_day = trading_days[-1]
+
+    windows: list[tuple[int, date, date]] = []
+    for months in window_months:
+        if months <= 0:
+            raise ValueError(f"window_months must be positive: {months}")
+        start = first_month
+        while True:
+            end = _add_months(start, months) - timedelta(days=1)
+            if end > last_day:
+                break
+            windows.append((months, start, end))
+            start = _add_months(start, step_months)
+    return windows
+
+
+def _init_worker(cfg: dict, matrix: SignalMatrix, rank_index: RankIndex) -> None:
+    _SHARED["cfg"] = cfg
+    _SHARED["matrix"] = matrix
+    _SHARED["rank_index"] = rank_index
+
+
+def evaluate_window(window: tuple[int, date, date]) -> dict | None:
+    months, start, end = window
+    cfg = copy.deepcopy(_SHARED["cfg"])
+    cfg["backtest"].update({"start_date": start.isoformat(), "end_date": end.isoformat()})
+    try:
+        # Every window reads the same matrix and the same precomputed rankings.
+        _, metrics = run_backtest(cfg, _SHARED["matrix"], _SHARED["rank_index"])
+    except ValueError:
+        return None
+
+    row: dict = {
+        "window_months": months,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+    }
+    row.update({str(item["metric"]): float(item["value"]) for item in metrics})
+    return row
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    cfg = load_config("config.yaml")
+    wf_cfg = cfg.get("walk_forward", {}) or {}
+    result_dir = ensure_dir(wf_cfg.get("result_dir", "outputs/walk_forward"))
+    window_months = args.window_months or [int(x) for x in wf_cfg.get("window_months", [12, 36])]
+    step_months = (
+        args.step_months if args.step_months is not None else int(wf_cfg.get("step_months", 1))
+    )
+    workers = args.workers if args.workers is not None else int(wf_cfg.get("workers", 1))
+
+    signal_dir = Path(cfg["data"]["prepared_dir"]) / "signals"
+    matrix = load_signal_matrix(signal_dir)
+    # Windows only select subsets of the full schedule, so one ranking pass serves them all.
+    rank_index = build_rank_index(
+        matrix,
+        int(cfg["strategy"]["top_n"]),
+        rebalance_positions(matrix.days, rebalance=rebalance_spec(cfg)),
+    )
+
+    windows = build_windows(matrix.days, window_months, step_months)
+    if not windows:
+        raise ValueError("No walk-forward window fits inside the signal history.")
+    print(
+        f"[walk_forward] windows={len(windows)} months={window_months} step={step_months} "
+        f"days={matrix.num_days} symbols={matrix.num_symbols} workers={workers}"
+    )
+
+    pool_size = min(max(1, workers), len(windows))
+    if pool_size > 1:
+        # Workers inherit the matrix and rankings once through the initializer.
+        pool_cm = ProcessPoolExecutor(
+            max_workers=pool_size,
+            initializer=_init_worker,
+            initargs=(cfg, matrix, rank_index),
+        )
+    else:
+        _init_worker(cfg, matrix, rank_index)
+        pool_cm = nullcontext()
+    with pool_cm as pool:
+        if pool is not None:
+            chunksize = max(1, len(windows) // (4 * pool_size))
+            results = list(pool.map(evaluate_window, windows, chunksize=chunksize))
+        else:
+            results = list(map(evaluate_window, windows))
+
+    rows = [row for row in results if row is not None]
+    skipped = len(results) - len(rows)
+    for months in window_months:
+        subset = [row for row in rows if row["window_months"] == months]
+        if subset:
+            mean_return = sum(row["annualized_return"] for row in subset) / len(subset)
+            worst_drawdown = min(row["max_drawdown"] for row in subset)
+            positive = sum(1 for row in subset if row["total_return"] > 0) / len(subset)
+            print(
+                f"[walk_forward] months={months} windows={len(subset)} "
+                f"mean_annualized_return={mean_return:.4f} "
+                f"worst_max_drawdown={worst_drawdown:.4f} positive_share={positive:.2%}"
+            )
+
+    metrics_path = result_dir / "walk_forward_metrics.parquet"
+    write_table(metrics_path, rows)
+    print(f"[walk_forward] skipped={skipped} (too few rebalance dates)")
+    print(f"[walk_forward] metrics={metrics_path}")
+    print("[walk_forward] done")
+
+
+if __name__ == "__main__":
+    main()